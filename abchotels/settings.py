@@ -58,6 +58,38 @@ DATABASES = {
     }
 }
 
+# Pick the default cache with ABCHOTELS_CACHE. The default 'locmem' is per
+# process; 'shared' opts in to one SQLite file used by every worker process on
+# this host; 'database' needs `python manage.py createcachetable`.
+CACHE_BACKENDS = {
+    'shared': {
+        'BACKEND': 'hotel.sqlite_cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache' / 'shared_cache.sqlite3',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            'MAX_BYTES': 256 * 1024 * 1024,
+        },
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'database': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'hotel_cache',
+    },
+    'dummy': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+# The 'shared' alias is always the SQLite file, whatever the default is. It
+# holds the small state every worker must agree on: page cache generations and
+# counters, and the mail circuit breaker.
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('ABCHOTELS_CACHE', 'locmem')],
+    'shared': CACHE_BACKENDS['shared'],
+}
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -89,4 +121,15 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'anitatam2001@gmail.com'
 EMAIL_HOST_PASSWORD = 'cfemkkdeljjaufrn'  # Your app-specific password
 DEFAULT_FROM_EMAIL = 'ABC Hotels <anitatam2001@gmail.com>'
-SERVER_EMAIL = 'ABC Hotels <anitatam2001@gmail.com>'
\ No newline at end of file
+SERVER_EMAIL = 'ABC Hotels <anitatam2001@gmail.com>'
+# Seconds an SMTP connect or send may block (hotel/mailer.py)
+EMAIL_TIMEOUT = 10
+# Consecutive SMTP failures that pause sending, and for how many seconds
+SMTP_BREAKER_FAILURES = 5
+SMTP_BREAKER_OPEN_SECONDS = 60
+
+# Company notifications (hotel/digests.py): minutes of new bookings and contact
+# submissions per summary email, or 0 for one email each
+NOTIFICATION_DIGEST_MINUTES = 0
+# Cities whose bookings still get one notification each in digest mode
+NOTIFICATION_REALTIME_CITIES = []
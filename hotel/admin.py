@@ -2,9 +2,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.contrib.admin.views.main import ChangeList
+from django.utils import timezone
 from django.utils.html import format_html
 from django import forms
-from .models import City, Department, RoomType, Room, Booking, FAQ, JobListing, JobApplication, UserProfile, ContactSubmission
+from .models import City, Department, RoomType, Room, Booking, FAQ, JobListing, JobApplication, UserProfile, ContactSubmission, RoomInventory, RoomRate, OutboxMessage
 
 # ================================
 # USER PROFILE INLINE ADMIN
@@ -38,6 +40,7 @@ class UserAdmin(BaseUserAdmin):
     list_display = ['username', 'email', 'first_name', 'last_name',
     'get_phone_number', 'is_staff', 'is_active']
     list_filter = ['is_staff', 'is_active', 'groups']
+    list_select_related = ['profile']
 
     def get_phone_number(self, obj):
         if hasattr(obj, 'profile') and obj.profile.phone_number:
@@ -229,6 +232,30 @@ class ContactSubmissionAdmin(admin.ModelAdmin):
         }),
     )
 
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipient_list', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['dedupe_key', 'subject']
+    readonly_fields = ['dedupe_key', 'subject', 'body', 'html_body', 'from_email', 'recipients',
+    'status', 'attempts', 'next_attempt_at', 'claimed_by', 'last_error', 'created_at', 'sent_at']
+    list_per_page = 50
+    actions = ['retry_now']
+
+    def has_add_permission(self, request):
+        # Messages are queued by the views; see hotel.outbox
+        return False
+
+    def recipient_list(self, obj):
+        return ', '.join(obj.recipients)
+    recipient_list.short_description = 'Recipients'
+
+    @admin.action(description='Retry selected messages now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboxMessage.SENT).update(
+            status=OutboxMessage.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} message(s) queued for the next send_outbox batch")
+
 # ================================
 # EXISTING HOTEL MODELS ADMIN
 # ================================
@@ -355,6 +382,28 @@ class RoomAdmin(admin.ModelAdmin):
         return "No specific image"
     room_specific_image_preview_large.short_description = 'Room Specific Image Preview'
 
+class BookingChangeList(ChangeList):
+    """
+    Annotates totals (BookingQuerySet.with_totals) on the rows of the page
+    only, so the counts and date hierarchy over the whole table skip the
+    joins. Sorting by price needs them on every row, so it annotates first.
+    """
+    def get_queryset(self, request):
+        if self.sorts_by_price():
+            self.root_queryset = self.root_queryset.with_totals()
+        return super().get_queryset(request)
+
+    def get_results(self, request):
+        super().get_results(request)
+        if not self.sorts_by_price():
+            self.result_list = self.result_list.with_totals()
+
+    def sorts_by_price(self):
+        return any(
+            self.get_ordering_field(self.list_display[index]) == 'total_price'
+            for index in self.get_ordering_field_columns()
+        )
+
 class BookingAdmin(admin.ModelAdmin):
     list_display = ['id', 'guest_name', 'room_display', 'total_guests',
     'check_in', 'check_out', 'status', 'total_price_display',
@@ -363,16 +412,42 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ['guest_name', 'guest_email', 'room__city__name',
     'room__room_type__name']
     readonly_fields = ['created_at', 'updated_at', 'total_price_display']
+    raw_id_fields = ['user']
     list_per_page = 20
     date_hierarchy = 'created_at'
+    list_select_related = ['room__city', 'room__room_type']
 
     def room_display(self, obj):
         return str(obj.room)
     room_display.short_description = 'Room'
 
+    def get_changelist(self, request, **kwargs):
+        return BookingChangeList
+
     def total_price_display(self, obj):
         return f"${obj.total_price}"
     total_price_display.short_description = 'Total Price'
+    total_price_display.admin_order_field = 'total_price'
+
+class RoomRateAdmin(admin.ModelAdmin):
+    list_display = ['night', 'room_type', 'city', 'price']
+    list_filter = ['room_type', 'city']
+    list_editable = ['price']
+    date_hierarchy = 'night'
+    list_per_page = 50
+    list_select_related = ['room_type', 'city']
+
+class RoomInventoryAdmin(admin.ModelAdmin):
+    list_display = ['night', 'city', 'room_type', 'sold', 'total', 'free']
+    list_filter = ['city', 'room_type']
+    date_hierarchy = 'night'
+    readonly_fields = ['city', 'room_type', 'night', 'sold', 'total']
+    list_per_page = 50
+    list_select_related = ['city', 'room_type']
+
+    def has_add_permission(self, request):
+        # Rows are maintained from bookings; see rebuild_inventory
+        return False
 
 class FAQAdmin(admin.ModelAdmin):
     list_display = ['id', 'question', 'category', 'order', 'is_active']
@@ -392,16 +467,24 @@ class JobListingAdmin(admin.ModelAdmin):
     date_hierarchy = 'posted_date'
     list_select_related = ['department']
 
+class JobListingFilter(admin.RelatedFieldListFilter):
+    """Job filter whose choices load each listing's department in the same query"""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        jobs = JobListing.objects.select_related('department').order_by(*ordering)
+        return [(job.pk, str(job)) for job in jobs]
+
 class JobApplicationAdmin(admin.ModelAdmin):
     list_display = ['id', 'first_name', 'last_name', 'job_display', 'status',
     'applied_date']
-    list_filter = ['status', 'job', 'applied_date']
+    list_filter = ['status', ('job', JobListingFilter), 'applied_date']
     list_editable = ['status']
     search_fields = ['first_name', 'last_name', 'email']
     readonly_fields = ['applied_date']
     date_hierarchy = 'applied_date'
     list_per_page = 20
-    list_select_related = ['job']
+    list_select_related = ['job__department']
 
     def job_display(self, obj):
         return str(obj.job)
@@ -420,15 +503,18 @@ admin.site.register(City, CityAdmin)
 admin.site.register(Department, DepartmentAdmin)
 admin.site.register(RoomType, RoomTypeAdmin)
 admin.site.register(Room, RoomAdmin)
+admin.site.register(RoomRate, RoomRateAdmin)
 
 # Register UserProfile under Rooms section
 admin.site.register(UserProfile, UserProfileAdmin)
 
 # Register ContactSubmission
 admin.site.register(ContactSubmission, ContactSubmissionAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
 
 # Continue with other models
 admin.site.register(Booking, BookingAdmin)
+admin.site.register(RoomInventory, RoomInventoryAdmin)
 admin.site.register(FAQ, FAQAdmin)
 admin.site.register(JobListing, JobListingAdmin)
 admin.site.register(JobApplication, JobApplicationAdmin)
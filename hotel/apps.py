@@ -4,3 +4,10 @@ class HotelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hotel'
 
+    def ready(self):
+        # Connect the signal handlers that keep RoomInventory in sync
+        from . import inventory  # noqa: F401
+        # ...and the ones that invalidate cached public pages
+        from . import caching  # noqa: F401
+        # ...and the ones that mark cached reference tables as stale
+        from . import reference  # noqa: F401
@@ -0,0 +1,191 @@
+# hotel/availability.py
+import heapq
+from datetime import datetime
+
+import numpy as np
+from django.db.models import FilteredRelation, Min, Q
+
+from django.utils import timezone
+
+from .models import Booking, Room, RoomHold, RoomType
+
+# Every status except 'cancelled' keeps the room occupied, including
+# legacy values such as 'pending' that are not in STATUS_CHOICES
+CANCELLED = 'cancelled'
+
+
+def parse_stay_dates(check_in, check_out):
+    """
+    Parse the check_in/check_out query parameters (YYYY-MM-DD).
+    Returns a (check_in, check_out) tuple of dates, or None when either
+    value is missing, malformed or the stay is shorter than one night.
+    """
+    if not check_in or not check_out:
+        return None
+    try:
+        check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
+        check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+    if check_out_date <= check_in_date:
+        return None
+    return check_in_date, check_out_date
+
+
+def overlapping_bookings(check_in, check_out):
+    """Non-cancelled bookings occupying at least one night of [check_in, check_out)"""
+    return Booking.objects.exclude(status=CANCELLED).filter(
+        check_in__lt=check_out,
+        check_out__gt=check_in,
+    )
+
+
+def active_holds(check_in, check_out, exclude_session=None):
+    """Unexpired checkout holds on at least one night of [check_in, check_out)"""
+    holds = RoomHold.objects.filter(
+        expires_at__gt=timezone.now(),
+        check_in__lt=check_out,
+        check_out__gt=check_in,
+    )
+    if exclude_session:
+        holds = holds.exclude(session_key=exclude_session)
+    return holds
+
+
+def booked_room_ids(check_in, check_out, exclude_session=None):
+    """
+    Subquery of room ids that are booked or held by another guest for part
+    of the stay. Holds placed by exclude_session do not count.
+    """
+    return Room.objects.filter(
+        Q(pk__in=overlapping_bookings(check_in, check_out).values('room_id')) |
+        Q(pk__in=active_holds(check_in, check_out, exclude_session).values('room_id'))
+    ).values('pk')
+
+
+class OccupancyIndex:
+    """
+    Night-occupancy bitsets for a set of rooms over the window [start, end).
+
+    Bit i of a room's mask is set when night start + i is sold. as_array()
+    unpacks the masks into a NumPy matrix, so a search over hundreds of
+    rooms and many check-in dates is pure array work.
+    """
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.size = (end - start).days
+        self.room_types = {}
+        self.masks = {}
+
+    def span_mask(self, check_in, check_out):
+        """Bitmask of the nights [check_in, check_out) clipped to the window"""
+        first = max((check_in - self.start).days, 0)
+        last = min((check_out - self.start).days, self.size)
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+
+    def add_room(self, room_id, room_type_id):
+        self.room_types[room_id] = room_type_id
+        self.masks.setdefault(room_id, 0)
+
+    def occupy(self, room_id, check_in, check_out):
+        self.masks[room_id] = self.masks.get(room_id, 0) | self.span_mask(check_in, check_out)
+
+    def as_array(self):
+        """
+        (room_ids, room_type_ids, occupied) where occupied is a NumPy bool
+        array of shape (rooms, nights) in ascending room id order.
+        """
+        room_ids = sorted(self.masks)
+        width = (self.size + 7) // 8
+        packed = np.frombuffer(
+            b''.join(self.masks[room_id].to_bytes(width, 'little') for room_id in room_ids),
+            dtype=np.uint8
+        ).reshape(len(room_ids), width)
+        occupied = np.unpackbits(packed, axis=1, bitorder='little')[:, :self.size].astype(bool)
+        room_type_ids = [self.room_types[room_id] for room_id in room_ids]
+        return room_ids, room_type_ids, occupied
+
+    @classmethod
+    def build(cls, rooms, start, end, exclude_session=None):
+        """
+        Build the index for a Room queryset with a single query: each room is
+        LEFT JOINed to just the active bookings that overlap the window.
+        Checkout holds of other guests are added from a second small query.
+        """
+        index = cls(start, end)
+        rows = rooms.annotate(
+            stay=FilteredRelation(
+                'bookings',
+                condition=Q(
+                    bookings__check_in__lt=end,
+                    bookings__check_out__gt=start,
+                ) & ~Q(bookings__status=CANCELLED),
+            )
+        ).values_list('id', 'room_type_id', 'stay__check_in', 'stay__check_out')
+
+        for room_id, room_type_id, booked_in, booked_out in rows:
+            index.add_room(room_id, room_type_id)
+            if booked_in is not None:
+                index.occupy(room_id, booked_in, booked_out)
+
+        holds = active_holds(start, end, exclude_session).filter(room__in=rooms)
+        for room_id, held_in, held_out in holds.values_list('room_id', 'check_in', 'check_out'):
+            index.occupy(room_id, held_in, held_out)
+        return index
+
+
+def room_type_availability(city, check_in=None, check_out=None, min_capacity=None):
+    """
+    Room types offered in a city by name, each with available_count (rooms
+    that can be sold for the stay, from RoomInventory) and available_room_id
+    (lowest room free for every night, or None). Optionally limited to room
+    types holding at least min_capacity guests.
+    """
+    # inventory imports this module for CANCELLED and active_holds
+    from .inventory import free_room_counts
+
+    free = Q()
+    if check_in and check_out:
+        free = ~Q(room__pk__in=booked_room_ids(check_in, check_out))
+    room_types = RoomType.objects.filter(
+        room__city=city,
+        room__is_available=True
+    ).annotate(
+        available_room_id=Min('room__id', filter=free)
+    ).order_by('name')
+    if min_capacity is not None:
+        room_types = room_types.filter(capacity__gte=min_capacity)
+
+    counts = free_room_counts(check_in, check_out, city=city)
+    room_types = list(room_types)
+    for room_type in room_types:
+        # Without one room free for the whole stay there is nothing to book
+        room_type.available_count = (
+            counts.get((city.id, room_type.id), 0) if room_type.available_room_id else 0
+        )
+    return room_types
+
+
+def double_bookings(stays):
+    """
+    Overlapping pairs in a stream of (booking_id, room_id, check_in, check_out)
+    rows sorted by (room_id, check_in). One pass over the rows; only the stays
+    still open in the current room are kept, in a heap ordered by check-out.
+    Yields (earlier_stay, later_stay) tuples of the input rows.
+    """
+    current_room = None
+    open_stays = []
+    for stay in stays:
+        booking_id, room_id, check_in, check_out = stay[:4]
+        if room_id != current_room:
+            current_room = room_id
+            open_stays = []
+        while open_stays and open_stays[0][0] <= check_in:
+            heapq.heappop(open_stays)
+        for _, _, earlier in sorted(open_stays, key=lambda entry: entry[1]):
+            yield earlier, stay
+        heapq.heappush(open_stays, (check_out, booking_id, stay))
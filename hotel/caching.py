@@ -0,0 +1,145 @@
+# hotel/caching.py
+import hashlib
+import time
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.contrib import messages
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.connection import ConnectionProxy
+
+from .models import FAQ, Booking, City, Department, JobListing, Room, RoomRate, RoomType
+
+# Cached pages are normally invalidated by a generation bump; the timeout is a backstop
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Availability also changes as checkout holds come and go, which bumps nothing
+AVAILABILITY_CACHE_TIMEOUT = 60
+
+# Generations each model's saves and deletes invalidate
+INVALIDATED_BY = {
+    City: ['catalog'],
+    RoomType: ['catalog'],
+    Room: ['catalog'],
+    RoomRate: ['catalog'],
+    Booking: ['availability'],
+    FAQ: ['faq'],
+    JobListing: ['careers'],
+    Department: ['careers'],
+}
+
+# Names of the views wrapped by cache_public_page, for page_cache_stats()
+CACHED_VIEWS = []
+
+# Pages may sit in a per-process cache, but generations and counters live in
+# the cache every worker shares, so a bump in one worker invalidates them all
+shared_cache = ConnectionProxy(caches, 'shared')
+
+
+def generation_key(name):
+    return f'page-cache:generation:{name}'
+
+
+def generations(names):
+    """
+    Current value of each generation. A missing one starts from the clock,
+    so a generation evicted from the cache never repeats an old value.
+    """
+    keys = [generation_key(name) for name in names]
+    values = shared_cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            shared_cache.add(key, time.time_ns(), None)
+            values[key] = shared_cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump_generations(*names):
+    """Invalidate every cached page built from these generations, once the transaction commits"""
+    def bump():
+        for name in names:
+            try:
+                shared_cache.incr(generation_key(name))
+            except ValueError:
+                shared_cache.set(generation_key(name), time.time_ns(), None)
+    transaction.on_commit(bump)
+
+
+def invalidate_pages(sender, **kwargs):
+    bump_generations(*INVALIDATED_BY[sender])
+
+
+for model in INVALIDATED_BY:
+    post_save.connect(invalidate_pages, sender=model, dispatch_uid=f'page-cache-save-{model.__name__}')
+    post_delete.connect(invalidate_pages, sender=model, dispatch_uid=f'page-cache-delete-{model.__name__}')
+
+
+def count(view_name, outcome):
+    key = f'page-cache:{outcome}:{view_name}'
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        # First count; add() also copes with backends that store nothing
+        shared_cache.add(key, 1, None)
+
+
+def page_cache_stats():
+    """Hits and misses per cached view since the counters were created"""
+    keys = [f'page-cache:{outcome}:{name}' for name in CACHED_VIEWS for outcome in ('hits', 'misses')]
+    values = shared_cache.get_many(keys)
+    return {
+        name: {outcome: values.get(f'page-cache:{outcome}:{name}', 0) for outcome in ('hits', 'misses')}
+        for name in CACHED_VIEWS
+    }
+
+
+def page_key(request, view_name, depends_on):
+    # Blank parameters are dropped: the views treat them as missing
+    query = urlencode(sorted(
+        (name, value) for name, values in request.GET.lists() for value in values if value
+    ))
+    # Pages show today's date as the earliest check-in, so they expire at midnight
+    parts = [request.path, query, date.today().isoformat(), *map(str, generations(depends_on))]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return f'page-cache:page:{view_name}:{digest}'
+
+
+def cache_public_page(*depends_on, timeout=PAGE_CACHE_TIMEOUT):
+    """
+    Cache a view's responses for anonymous visitors, keyed on the path, the
+    normalized query string and the generations named in depends_on. Saving
+    or deleting a model listed in INVALIDATED_BY bumps its generations, so
+    the next request renders afresh. Logged-in visitors, pending messages
+    and non-GET requests always reach the view, because the page would
+    differ for them.
+    """
+    def decorator(view):
+        view_name = view.__name__
+        CACHED_VIEWS.append(view_name)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or request.user.is_authenticated or
+                    len(messages.get_messages(request))):
+                return view(request, *args, **kwargs)
+
+            key = page_key(request, view_name, depends_on)
+            cached = cache.get(key)
+            if cached is not None:
+                count(view_name, 'hits')
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            count(view_name, 'misses')
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response.content, response['Content-Type']), timeout)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
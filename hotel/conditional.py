@@ -0,0 +1,130 @@
+# hotel/conditional.py
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Count, IntegerField, Max, Q, Value
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import FAQ, Booking, City, Department, JobListing, Room, RoomHold, RoomRate, RoomType
+
+
+def versions(*querysets, field='updated_at'):
+    """
+    Latest `field` value and row count of each queryset, in one UNION ALL
+    query. The count catches deletions, which leave the latest value as it
+    was. Pass (queryset, field) instead of a queryset to use another field.
+    """
+    parts = []
+    for position, queryset in enumerate(querysets):
+        queryset, latest_field = queryset if isinstance(queryset, tuple) else (queryset, field)
+        parts.append(queryset.order_by().annotate(
+            part=Value(position, output_field=IntegerField())
+        ).values('part').annotate(
+            last=Max(latest_field), count=Count('pk')
+        ).values_list('part', 'last', 'count'))
+    rows = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    found = {part: (last, count) for part, last, count in rows}
+    return [found.get(position, (None, 0)) for position in range(len(parts))]
+
+
+def conditional_page(page_state):
+    """
+    Answer conditional GETs with 304 Not Modified before the view runs.
+
+    page_state(request, *args, **kwargs) returns (parts, last_modified):
+    the values the page is built from, hashed into the ETag, and the time
+    of the latest change, or None to send an ETag only because some
+    changes are not timestamped. It returns None when the view should just
+    run, e.g. for a missing object. The visitor and today's date are added
+    to both, since the header and the date pickers depend on them.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return view(request, *args, **kwargs)
+            state = page_state(request, *args, **kwargs)
+            if state is None:
+                return view(request, *args, **kwargs)
+
+            parts, last_modified = state
+            today = timezone.localdate()
+            etag = quote_etag(hashlib.md5(repr((request.user.pk, today, parts)).encode()).hexdigest())
+            if last_modified is not None:
+                changes = [
+                    last_modified,
+                    timezone.make_aware(datetime.combine(today, time.min)),
+                    getattr(request.user, 'last_login', None),
+                ]
+                last_modified = int(max(change for change in changes if change).timestamp())
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.headers.setdefault('ETag', etag)
+                if last_modified is not None:
+                    response.headers.setdefault('Last-Modified', http_date(last_modified))
+            return response
+        return wrapper
+    return decorator
+
+
+def latest(*stamps):
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def faq_state(request):
+    faqs, = versions(FAQ.objects.all())
+    return faqs, faqs[0]
+
+
+def careers_state(request):
+    jobs, departments = versions(JobListing.objects.all(), Department.objects.all())
+    return (jobs, departments), latest(jobs[0], departments[0])
+
+
+def job_detail_state(request, job_id):
+    job = JobListing.objects.filter(pk=job_id).values_list(
+        'updated_at', 'department__updated_at'
+    ).first()
+    if job is None:
+        return None
+    return job, latest(*job)
+
+
+def room_detail_state(request, room_id):
+    room = Room.objects.filter(pk=room_id).values_list(
+        'room_type_id', 'updated_at', 'room_type__updated_at'
+    ).first()
+    if room is None:
+        return None
+    room_type_id, room_updated, room_type_updated = room
+    # Similar rooms of the same type are listed with their cities
+    similar, cities = versions(Room.objects.filter(room_type_id=room_type_id), City.objects.all())
+    return (room, similar, cities), latest(room_updated, room_type_updated, similar[0], cities[0])
+
+
+def city_detail_state(request, city_id):
+    """
+    Every city and room count (city picker), the room types, rates and
+    availability of this city. Checkout holds appear and expire without
+    any timestamp to compare, so this page gets an ETag only.
+    """
+    now = timezone.now()
+    parts = versions(
+        City.objects.all(),
+        Room.objects.all(),
+        RoomType.objects.all(),
+        RoomRate.objects.filter(Q(city_id=city_id) | Q(city__isnull=True)),
+        # Cancelling a booking saves it, which moves MAX(updated_at) too
+        Booking.objects.filter(room__city_id=city_id, check_out__gt=now.date()),
+        (RoomHold.objects.filter(room__city_id=city_id, expires_at__gt=now), 'expires_at'),
+    )
+    return (parts, request.GET.urlencode()), None
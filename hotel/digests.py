@@ -0,0 +1,139 @@
+# hotel/digests.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import CharField, Count, DecimalField, F, IntegerField, Sum, Value
+from django.utils import timezone
+
+from .availability import CANCELLED
+from .models import Booking, ContactSubmission, OutboxMessage
+from .outbox import enqueue, message
+
+# Minutes of new bookings and contact submissions summed up in one email to
+# the hotel inbox. 0 sends one notification per booking or submission.
+DIGEST_MINUTES = getattr(settings, 'NOTIFICATION_DIGEST_MINUTES', 0)
+# Cities whose bookings are still notified one by one in digest mode
+REALTIME_CITIES = frozenset(getattr(settings, 'NOTIFICATION_REALTIME_CITIES', ()))
+
+DIGEST_KEY_PREFIX = 'company-digest-'
+DIGEST_KEY_FORMAT = '%Y%m%dT%H%M%SZ'
+
+# End of the last window this process found nothing left to queue for
+_queued_until = None
+
+
+def sends_realtime(city_name=None):
+    """
+    Whether a company notification is sent on its own instead of in the
+    digest. Contact submissions have no city, so pass None for them.
+    """
+    return not DIGEST_MINUTES or (city_name is not None and city_name in REALTIME_CITIES)
+
+
+def window_end(now):
+    """Start of the digest window now falls in, i.e. the end of the last complete one"""
+    length = DIGEST_MINUTES * 60
+    return datetime.fromtimestamp(now.timestamp() // length * length, tz=dt_timezone.utc)
+
+
+def last_digest_end():
+    key = OutboxMessage.objects.filter(dedupe_key__startswith=DIGEST_KEY_PREFIX).order_by(
+        '-dedupe_key'
+    ).values_list('dedupe_key', flat=True).first()
+    if key is None:
+        return None
+    return datetime.strptime(key[len(DIGEST_KEY_PREFIX):], DIGEST_KEY_FORMAT).replace(tzinfo=dt_timezone.utc)
+
+
+def digest_rows(start, end):
+    """
+    One UNION ALL query: per city, the bookings made in [start, end) with
+    their nights, guests and value, then the contact submissions.
+    Rows are (kind, label, count, nights, guests, revenue).
+    """
+    price = DecimalField(max_digits=12, decimal_places=2)
+    bookings = Booking.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).exclude(status=CANCELLED).exclude(
+        room__city__name__in=REALTIME_CITIES
+    ).with_totals().order_by().annotate(
+        kind=Value('booking', output_field=CharField()),
+        label=F('room__city__name'),
+    ).values('kind', 'label').annotate(
+        count=Count('pk'),
+        total_nights=Sum('nights'),
+        guests=Sum('display_guests'),
+        revenue=Sum('total_price', output_field=price),
+    ).values_list('kind', 'label', 'count', 'total_nights', 'guests', 'revenue')
+    contacts = ContactSubmission.objects.filter(
+        submitted_at__gte=start, submitted_at__lt=end
+    ).order_by().annotate(
+        kind=Value('contact', output_field=CharField()),
+        label=Value('', output_field=CharField()),
+    ).values('kind', 'label').annotate(
+        count=Count('pk'),
+        total_nights=Value(0, output_field=IntegerField()),
+        guests=Value(0, output_field=IntegerField()),
+        revenue=Value(Decimal('0'), output_field=price),
+    ).values_list('kind', 'label', 'count', 'total_nights', 'guests', 'revenue')
+    # Grouping by constants alone can yield a row with a zero count
+    return [row for row in bookings.union(contacts, all=True) if row[2]]
+
+
+def digest_body(start, end, rows):
+    booking_rows = sorted((row for row in rows if row[0] == 'booking'), key=lambda row: row[1])
+    contacts = sum(row[2] for row in rows if row[0] == 'contact')
+    local = timezone.localtime
+    lines = [
+        'BOOKING AND CONTACT DIGEST - ABC Hotels',
+        '',
+        f"{local(start):%Y-%m-%d %H:%M} to {local(end):%Y-%m-%d %H:%M} ({settings.TIME_ZONE})",
+        '',
+    ]
+    if booking_rows:
+        lines += ['New bookings by hotel:', '───────────────']
+        for kind, city, count, nights, guests, revenue in booking_rows:
+            revenue = Decimal(revenue or 0).quantize(Decimal('0.01'))
+            lines.append(f"• ABC {city} Hotel: {count} booking(s), {nights} night(s), "
+                         f"{guests} guest(s), ${revenue}")
+        lines.append('')
+    if contacts:
+        lines += [f"New contact form submissions: {contacts}", '']
+    lines += ['Details are in the admin under Bookings and Contact Submissions.', '', '---',
+              'ABC Hotels Management System']
+    return '\n'.join(lines)
+
+
+def queue_digest(now=None):
+    """
+    Queue one summary email for the bookings and contact submissions made
+    since the last digest, once per NOTIFICATION_DIGEST_MINUTES window.
+    Quiet windows send nothing and roll into the next digest. Returns the
+    message queued, or None.
+    """
+    global _queued_until
+    if not DIGEST_MINUTES:
+        return None
+    end = window_end(now or timezone.now())
+    if _queued_until is not None and _queued_until >= end:
+        return None
+    start = last_digest_end() or end - timedelta(minutes=DIGEST_MINUTES)
+    if start >= end:
+        _queued_until = end
+        return None
+
+    rows = digest_rows(start, end)
+    _queued_until = end
+    if not rows:
+        return None
+    digest = message(
+        f"{DIGEST_KEY_PREFIX}{end.astimezone(dt_timezone.utc):{DIGEST_KEY_FORMAT}}",
+        f"📋 Booking and contact digest - {sum(row[2] for row in rows)} new",
+        digest_body(start, end, rows),
+        [settings.EMAIL_HOST_USER],
+        from_email='ABC Hotels Booking System <anitatam2001@gmail.com>',
+    )
+    # Queued with a key per window end, so a second worker queues nothing new
+    enqueue(digest)
+    return digest
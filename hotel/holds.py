@@ -0,0 +1,136 @@
+# hotel/holds.py
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .availability import active_holds, overlapping_bookings
+from .models import RoomHold
+
+# How long a room stays held while the guest fills in the booking form
+HOLD_MINUTES = getattr(settings, 'ROOM_HOLD_MINUTES', 10)
+# Minimum seconds between opportunistic sweeps from one process
+SWEEP_INTERVAL = 60
+
+
+class ExpiringMap:
+    """Small thread-safe in-process map whose entries expire after a deadline"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, deadline = entry
+            if deadline <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_matching(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def purge(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, (value, deadline) in self._data.items() if deadline <= now]:
+                del self._data[key]
+
+
+# Holds placed by this process: (session_key, room_id, check_in, check_out) -> expires_at
+_local_holds = ExpiringMap()
+_last_sweep = 0.0
+
+
+def place_hold(room, check_in, check_out, session_key):
+    """
+    Hold a room for the stay on behalf of a session. Returns the expiry
+    time, or None when the room is already booked or held by someone else.
+
+    A repeat GET of the booking form within the first half of the hold is
+    answered from the in-process map after one indexed lookup confirms the
+    hold still exists, since another process may have released or swept it.
+    """
+    # reservations imports this module for release_holds
+    from .reservations import with_lock_retry
+
+    key = (session_key, room.id, check_in, check_out)
+    expires_at = _local_holds.get(key)
+    if expires_at and expires_at - timezone.now() > timedelta(minutes=HOLD_MINUTES) / 2:
+        if RoomHold.objects.filter(
+            session_key=session_key, room=room, check_in=check_in, check_out=check_out,
+            expires_at=expires_at
+        ).exists():
+            return expires_at
+        _local_holds.discard(key)
+
+    maybe_sweep()
+    expires_at = with_lock_retry(_place_hold, room, check_in, check_out, session_key)
+    if expires_at is not None:
+        # The session's earlier holds were replaced, so none of its other keys are valid
+        _local_holds.discard_matching(lambda other: other[0] == session_key)
+        _local_holds.set(key, expires_at, HOLD_MINUTES * 60)
+    return expires_at
+
+
+def _place_hold(room, check_in, check_out, session_key):
+    from .reservations import lock_rooms
+
+    lock_rooms([room.id])
+    taken = overlapping_bookings(check_in, check_out).filter(room=room).exists() or \
+        active_holds(check_in, check_out, exclude_session=session_key).filter(room=room).exists()
+    if taken:
+        return None
+    # A guest holds one stay at a time: replace any earlier hold
+    RoomHold.objects.filter(session_key=session_key).delete()
+    expires_at = timezone.now() + timedelta(minutes=HOLD_MINUTES)
+    RoomHold.objects.create(
+        room=room,
+        session_key=session_key,
+        check_in=check_in,
+        check_out=check_out,
+        expires_at=expires_at
+    )
+    return expires_at
+
+
+def release_holds(session_key, room_ids=None):
+    """Drop the holds of a session, e.g. once its booking has been saved"""
+    holds = RoomHold.objects.filter(session_key=session_key)
+    if room_ids is not None:
+        holds = holds.filter(room_id__in=room_ids)
+    holds.delete()
+    _local_holds.discard_matching(
+        lambda key: key[0] == session_key and (room_ids is None or key[1] in room_ids)
+    )
+
+
+def sweep_expired_holds():
+    """Delete every expired hold with one batched DELETE. Returns the number removed."""
+    global _last_sweep
+    _last_sweep = time.monotonic()
+    _local_holds.purge()
+    deleted, _ = RoomHold.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def maybe_sweep():
+    """Sweep expired holds at most once per SWEEP_INTERVAL from this process"""
+    if time.monotonic() - _last_sweep >= SWEEP_INTERVAL:
+        sweep_expired_holds()
@@ -0,0 +1,307 @@
+# hotel/inventory.py
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .availability import CANCELLED, active_holds
+from .models import Booking, Room, RoomInventory
+
+
+def room_total(city_id, room_type_id):
+    """Number of sellable rooms of a room type in a city"""
+    return Room.objects.filter(
+        city_id=city_id,
+        room_type_id=room_type_id,
+        is_available=True
+    ).count()
+
+
+def adjust_sold(city_id, room_type_id, check_in, check_out, delta):
+    """Add delta to the sold count of every night in [check_in, check_out)"""
+    nights = (check_out - check_in).days
+    if nights <= 0 or not delta:
+        return
+    with transaction.atomic():
+        # Make sure a row exists for every night, then bump them all at once
+        total = room_total(city_id, room_type_id)
+        RoomInventory.objects.bulk_create([
+            RoomInventory(
+                city_id=city_id,
+                room_type_id=room_type_id,
+                night=check_in + timedelta(days=i),
+                total=total
+            )
+            for i in range(nights)
+        ], ignore_conflicts=True)
+        RoomInventory.objects.filter(
+            city_id=city_id,
+            room_type_id=room_type_id,
+            night__gte=check_in,
+            night__lt=check_out
+        ).update(sold=F('sold') + delta)
+
+
+def adjust_total(city_id, room_type_id, delta):
+    """Add delta to the room total of every stored night of a room type in a city"""
+    if delta:
+        RoomInventory.objects.filter(
+            city_id=city_id,
+            room_type_id=room_type_id
+        ).update(total=F('total') + delta)
+
+
+def recount_totals(city_ids):
+    """
+    Set the room total of every stored night in these cities from a fresh
+    count, in one UPDATE. For bulk room writes, which send no signals.
+    """
+    sellable = Room.objects.filter(
+        city_id=OuterRef('city_id'),
+        room_type_id=OuterRef('room_type_id'),
+        is_available=True
+    ).order_by().values('city_id').annotate(count=Count('id')).values('count')
+    return RoomInventory.objects.filter(city_id__in=city_ids).update(
+        total=Coalesce(Subquery(sellable), 0)
+    )
+
+
+def free_room_counts(check_in=None, check_out=None, city=None):
+    """
+    Rooms of each type that can still be sold for every night of
+    [check_in, check_out), as {(city_id, room_type_id): free}. Without a
+    stay, every sellable room counts as free.
+
+    Counts are type-level: a stay is sellable when each night has a free
+    room, even if the room has to be reassigned between nights. Sold nights
+    come from RoomInventory rather than the bookings; rooms held at checkout
+    by any guest on a night of the stay are not free on that night either.
+    """
+    rooms = Room.objects.filter(is_available=True)
+    if city is not None:
+        rooms = rooms.filter(city=city)
+    counts = {}
+    for row in rooms.values('city_id', 'room_type_id').annotate(total=Count('id')):
+        counts[(row['city_id'], row['room_type_id'])] = row['total']
+    if check_in is None or check_out is None:
+        return counts
+
+    # Rooms taken per night are the sold ones plus the held ones; the busiest
+    # night decides what is left
+    taken = {}
+    inventory = RoomInventory.objects.filter(
+        night__gte=check_in, night__lt=check_out, sold__gt=0
+    )
+    if city is not None:
+        inventory = inventory.filter(city=city)
+    for city_id, room_type_id, night, sold in inventory.values_list(
+        'city_id', 'room_type_id', 'night', 'sold'
+    ):
+        taken.setdefault((city_id, room_type_id), {})[night] = sold
+    holds = active_holds(check_in, check_out).filter(room__in=rooms).values_list(
+        'room__city_id', 'room__room_type_id', 'check_in', 'check_out'
+    )
+    for city_id, room_type_id, hold_in, hold_out in holds:
+        nights = taken.setdefault((city_id, room_type_id), {})
+        night = max(hold_in, check_in)
+        while night < min(hold_out, check_out):
+            nights[night] = nights.get(night, 0) + 1
+            night += timedelta(days=1)
+
+    for key, nights in taken.items():
+        if key in counts:
+            counts[key] = max(counts[key] - max(nights.values()), 0)
+    return counts
+
+
+# ================================
+# SIGNAL HANDLERS
+# ================================
+
+def _booking_stay(room_id, check_in, check_out, status):
+    """
+    (city_id, room_type_id, check_in, check_out) for an active booking on a
+    sellable room, else None. Rooms taken out of service are not in the
+    totals, so their bookings do not count as sold either.
+    """
+    if status == CANCELLED or not (room_id and check_in and check_out):
+        return None
+    key = Room.objects.filter(pk=room_id, is_available=True).values_list(
+        'city_id', 'room_type_id'
+    ).first()
+    if key is None:
+        return None
+    return (*key, check_in, check_out)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_stay(sender, instance, raw=False, **kwargs):
+    instance._inventory_stay = None
+    if raw or instance.pk is None:
+        return
+    previous = Booking.objects.filter(pk=instance.pk).values_list(
+        'room_id', 'check_in', 'check_out', 'status'
+    ).first()
+    if previous:
+        instance._inventory_stay = _booking_stay(*previous)
+
+
+@receiver(post_save, sender=Booking)
+def update_inventory_for_booking(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_stay = getattr(instance, '_inventory_stay', None)
+    new_stay = _booking_stay(instance.room_id, instance.check_in,
+                             instance.check_out, instance.status)
+    if old_stay == new_stay:
+        return
+    if old_stay:
+        adjust_sold(*old_stay, delta=-1)
+    if new_stay:
+        adjust_sold(*new_stay, delta=1)
+    instance._inventory_stay = new_stay
+
+
+@receiver(post_delete, sender=Booking)
+def release_inventory_for_booking(sender, instance, **kwargs):
+    stay = _booking_stay(instance.room_id, instance.check_in,
+                         instance.check_out, instance.status)
+    if stay:
+        adjust_sold(*stay, delta=-1)
+
+
+@receiver(pre_save, sender=Room)
+def remember_room_state(sender, instance, raw=False, **kwargs):
+    instance._inventory_state = None
+    if raw or instance.pk is None:
+        return
+    instance._inventory_state = Room.objects.filter(pk=instance.pk).values_list(
+        'city_id', 'room_type_id', 'is_available'
+    ).first()
+
+
+@receiver(post_save, sender=Room)
+def update_inventory_for_room(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = getattr(instance, '_inventory_state', None)
+    new_state = (instance.city_id, instance.room_type_id, instance.is_available)
+    if old_state == new_state:
+        return
+
+    if old_state and old_state[2]:
+        adjust_total(old_state[0], old_state[1], -1)
+    if instance.is_available:
+        adjust_total(instance.city_id, instance.room_type_id, 1)
+
+    # Bookings count as sold only on sellable rooms, so a room moved to another
+    # city or room type, or put in or out of service, takes its bookings with it
+    was_sold = bool(old_state and old_state[2])
+    if was_sold or (old_state and instance.is_available):
+        stays = instance.bookings.exclude(status=CANCELLED).values_list(
+            'check_in', 'check_out'
+        )
+        for check_in, check_out in stays:
+            if was_sold:
+                adjust_sold(old_state[0], old_state[1], check_in, check_out, delta=-1)
+            if instance.is_available:
+                adjust_sold(instance.city_id, instance.room_type_id, check_in, check_out, delta=1)
+    instance._inventory_state = new_state
+
+
+@receiver(post_delete, sender=Room)
+def release_inventory_for_room(sender, instance, **kwargs):
+    if instance.is_available:
+        adjust_total(instance.city_id, instance.room_type_id, -1)
+
+
+# ================================
+# FULL REBUILD
+# ================================
+
+def _next_night_sql():
+    if connection.vendor == 'sqlite':
+        return "date(n.night, '+1 day')"
+    return "n.night + 1"
+
+
+def inventory_select_sql():
+    """
+    Set-based SQL that expands every active booking into its nights and
+    aggregates them per (city, room_type, night) with the current room totals.
+    Returns (sql, params) yielding city_id, room_type_id, night, sold, total.
+    """
+    booking_table = Booking._meta.db_table
+    room_table = Room._meta.db_table
+    sql = f"""
+        WITH RECURSIVE nights(room_id, night, check_out) AS (
+            SELECT room_id, check_in, check_out
+            FROM {booking_table}
+            WHERE status <> %s AND check_out > check_in
+            UNION ALL
+            SELECT n.room_id, {_next_night_sql()}, n.check_out
+            FROM nights n
+            WHERE {_next_night_sql()} < n.check_out
+        ),
+        totals(city_id, room_type_id, total) AS (
+            SELECT city_id, room_type_id, COUNT(*)
+            FROM {room_table}
+            WHERE is_available = %s
+            GROUP BY city_id, room_type_id
+        )
+        SELECT r.city_id, r.room_type_id, n.night, COUNT(*), COALESCE(t.total, 0)
+        FROM nights n
+        JOIN {room_table} r ON r.id = n.room_id AND r.is_available = %s
+        LEFT JOIN totals t ON t.city_id = r.city_id AND t.room_type_id = r.room_type_id
+        GROUP BY r.city_id, r.room_type_id, n.night, t.total
+    """
+    return sql, [CANCELLED, True, True]
+
+
+def rebuild_inventory():
+    """Regenerate RoomInventory from scratch. Returns the number of rows written."""
+    inventory_table = RoomInventory._meta.db_table
+    select_sql, params = inventory_select_sql()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {inventory_table}")
+        cursor.execute(
+            f"INSERT INTO {inventory_table} (city_id, room_type_id, night, sold, total) "
+            f"{select_sql}",
+            params
+        )
+        cursor.execute(f"SELECT COUNT(*) FROM {inventory_table}")
+        return cursor.fetchone()[0]
+
+
+def inventory_drift():
+    """
+    Compare the stored table with a fresh computation.
+    Returns a list of (city_id, room_type_id, night, stored, expected) where
+    stored/expected are (sold, total) tuples, or None for a missing row.
+    """
+    select_sql, params = inventory_select_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(select_sql, params)
+        expected = {
+            (city_id, room_type_id, str(night)): (sold, total)
+            for city_id, room_type_id, night, sold, total in cursor.fetchall()
+        }
+
+    drift = []
+    stored_rows = RoomInventory.objects.values_list(
+        'city_id', 'room_type_id', 'night', 'sold', 'total'
+    ).iterator()
+    for city_id, room_type_id, night, sold, total in stored_rows:
+        key = (city_id, room_type_id, str(night))
+        wanted = expected.pop(key, None)
+        # Rows with nothing sold are equivalent to missing rows
+        if wanted is None and sold == 0:
+            continue
+        if wanted != (sold, total):
+            drift.append((*key, (sold, total), wanted))
+    for key, wanted in expected.items():
+        drift.append((*key, None, wanted))
+    return drift
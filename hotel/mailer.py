@@ -0,0 +1,141 @@
+# hotel/mailer.py
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import get_connection
+from django.utils.connection import ConnectionProxy
+
+# Seconds an SMTP connect or send may take before it counts as a failure
+SMTP_TIMEOUT = getattr(settings, 'EMAIL_TIMEOUT', None) or 10
+# Consecutive failures that open the circuit breaker
+FAILURE_THRESHOLD = getattr(settings, 'SMTP_BREAKER_FAILURES', 5)
+# Seconds the breaker stays open before one send may probe the server again
+OPEN_SECONDS = getattr(settings, 'SMTP_BREAKER_OPEN_SECONDS', 60)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Breaker state lives in the shared cache alias whatever the default cache is,
+# so every worker process on the host sees the same state
+shared_cache = ConnectionProxy(caches, 'shared')
+FAILURES_KEY = 'smtp-breaker:failures'
+OPENED_AT_KEY = 'smtp-breaker:opened-at'
+PROBE_KEY = 'smtp-breaker:probe'
+METRIC_KEYS = {
+    outcome: f'smtp-breaker:{outcome}' for outcome in ('sent', 'failed', 'skipped', 'latency-ms', 'max-latency-ms')
+}
+
+
+class MailUnavailable(Exception):
+    """The SMTP circuit breaker is open, so the message was not sent"""
+
+
+def connection():
+    """SMTP connection that gives up after SMTP_TIMEOUT seconds"""
+    return get_connection(fail_silently=False, timeout=SMTP_TIMEOUT)
+
+
+def add(key, amount=1):
+    try:
+        shared_cache.incr(key, amount)
+    except ValueError:
+        # First value; add() also copes with backends that store nothing
+        shared_cache.add(key, amount, None)
+
+
+def breaker_state(opened_at=None):
+    opened_at = opened_at if opened_at is not None else shared_cache.get(OPENED_AT_KEY)
+    if opened_at is None:
+        return CLOSED
+    return OPEN if time.time() - opened_at < OPEN_SECONDS else HALF_OPEN
+
+
+def allow_send():
+    """
+    Whether a send may go ahead. Once the breaker has been open for
+    OPEN_SECONDS, exactly one caller across all workers gets to probe.
+    """
+    state = breaker_state()
+    if state == HALF_OPEN:
+        return shared_cache.add(PROBE_KEY, True, SMTP_TIMEOUT * 2)
+    return state == CLOSED
+
+
+def record_success(elapsed_ms):
+    add(METRIC_KEYS['sent'])
+    record_latency(elapsed_ms)
+    if shared_cache.get(FAILURES_KEY) or shared_cache.get(OPENED_AT_KEY) is not None:
+        shared_cache.delete_many([FAILURES_KEY, OPENED_AT_KEY, PROBE_KEY])
+
+
+def record_failure(elapsed_ms):
+    add(METRIC_KEYS['failed'])
+    record_latency(elapsed_ms)
+    add(FAILURES_KEY)
+    failures = shared_cache.get(FAILURES_KEY, 0)
+    # A failed probe opens the breaker again for another OPEN_SECONDS
+    if failures >= FAILURE_THRESHOLD or breaker_state() == HALF_OPEN:
+        shared_cache.set(OPENED_AT_KEY, time.time(), None)
+        shared_cache.delete(PROBE_KEY)
+
+
+def record_latency(elapsed_ms):
+    add(METRIC_KEYS['latency-ms'], round(elapsed_ms))
+    # Not atomic; a concurrent slower send may be missed, which is fine for a gauge
+    if elapsed_ms > shared_cache.get(METRIC_KEYS['max-latency-ms'], 0):
+        shared_cache.set(METRIC_KEYS['max-latency-ms'], round(elapsed_ms), None)
+
+
+def deliver(email):
+    """
+    Send one EmailMessage through the circuit breaker. Raises MailUnavailable
+    without touching the network while the breaker is open; SMTP errors and
+    timeouts are counted and re-raised.
+    """
+    if not allow_send():
+        add(METRIC_KEYS['skipped'])
+        raise MailUnavailable('SMTP circuit breaker is open')
+    started = time.perf_counter()
+    try:
+        # Opening first keeps a shared connection open for the next message
+        email.get_connection().open()
+        email.send()
+    except Exception:
+        record_failure((time.perf_counter() - started) * 1000)
+        raise
+    record_success((time.perf_counter() - started) * 1000)
+
+
+def reopens_in():
+    """Seconds until the breaker lets a probe through, or None when it is closed"""
+    opened_at = shared_cache.get(OPENED_AT_KEY)
+    if opened_at is None:
+        return None
+    return max(OPEN_SECONDS - (time.time() - opened_at), 0)
+
+
+def mail_stats():
+    """Breaker state and send counters since the counters were created"""
+    values = shared_cache.get_many([FAILURES_KEY, OPENED_AT_KEY, *METRIC_KEYS.values()])
+    metrics = {outcome: values.get(key, 0) for outcome, key in METRIC_KEYS.items()}
+    attempts = metrics['sent'] + metrics['failed']
+    opened_at = values.get(OPENED_AT_KEY)
+    return {
+        'breaker': {
+            'state': breaker_state(opened_at),
+            'consecutive_failures': values.get(FAILURES_KEY, 0),
+            'opened_at': opened_at,
+            'failure_threshold': FAILURE_THRESHOLD,
+            'open_seconds': OPEN_SECONDS,
+        },
+        'sends': {
+            'sent': metrics['sent'],
+            'failed': metrics['failed'],
+            'skipped': metrics['skipped'],
+            'average_latency_ms': round(metrics['latency-ms'] / attempts, 1) if attempts else None,
+            'max_latency_ms': metrics['max-latency-ms'],
+            'timeout_seconds': SMTP_TIMEOUT,
+        },
+    }
@@ -0,0 +1,401 @@
+# hotel/management/commands/advise_indexes.py
+import re
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.migrations import Migration
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.writer import MigrationWriter
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from hotel import pages as hotel_pages
+from hotel.models import Booking, JobListing
+
+COLUMN = r'"(?P<table>\w+)"\."(?P<column>\w+)"'
+CONDITION = re.compile(COLUMN + r'\s*(?P<op>=|IN\b|IS\b|<=|>=|<|>|LIKE\b)', re.IGNORECASE)
+ORDER_COLUMN = re.compile(COLUMN + r'(?:\s+(?P<direction>ASC|DESC))?', re.IGNORECASE)
+EQUALITY_OPS = {'=', 'IN', 'IS'}
+NO_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+def strip_subqueries(sql):
+    """Replace every parenthesised SELECT with (?) so only the outer query is parsed"""
+    result = []
+    depth = 0
+    i = 0
+    while i < len(sql):
+        if depth == 0 and sql.startswith('(SELECT', i):
+            depth = 1
+            i += 1
+            continue
+        if depth:
+            if sql[i] == '(':
+                depth += 1
+            elif sql[i] == ')':
+                depth -= 1
+                if depth == 0:
+                    result.append('(?)')
+            i += 1
+            continue
+        result.append(sql[i])
+        i += 1
+    return ''.join(result)
+
+
+def clause(sql, keyword, enders):
+    """Text of the outer query's clause starting at keyword, up to the next ender"""
+    start = sql.find(keyword)
+    if start == -1:
+        return ''
+    start += len(keyword)
+    ends = [sql.find(ender, start) for ender in enders]
+    ends = [end for end in ends if end != -1]
+    return sql[start:min(ends)] if ends else sql[start:]
+
+
+def query_shape(sql):
+    """SQL with literals replaced, so queries differing only in values group together"""
+    return re.sub(r"'[^']*'|\b\d+\b", '?', sql)
+
+
+def plan_problems(plan, vendor):
+    """
+    (kind, table) pairs for full table scans and sorts that need a temporary
+    B-tree, from EXPLAIN QUERY PLAN rows (SQLite) or EXPLAIN lines (others).
+    """
+    problems = []
+    for line in plan:
+        if vendor == 'sqlite':
+            scan = re.match(r'SCAN (?:TABLE )?(\w+)', line)
+            if scan and 'USING' not in line:
+                problems.append(('full scan', scan.group(1)))
+            elif 'USE TEMP B-TREE FOR ORDER BY' in line:
+                problems.append(('temp sort', None))
+        else:
+            scan = re.search(r'Seq Scan on (\w+)', line)
+            if scan:
+                problems.append(('full scan', scan.group(1)))
+            elif re.search(r'->\s+Sort\b|^Sort\b', line.strip()):
+                problems.append(('temp sort', None))
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        'Render every hotel page against the current data, EXPLAIN each query, flag full '
+        'scans and temporary sorts, and recommend composite indexes with before/after timings'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore full scans of tables smaller than this (default: 1000)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per query when timing; the fastest is kept (default: 5)')
+        parser.add_argument('--min-gain-ms', type=float, default=1.0,
+                            help='Least time an index must save on its queries (default: 1.0)')
+        parser.add_argument('--only', help='Only render pages whose name contains this text')
+        parser.add_argument('--write-migration', action='store_true',
+                            help='Write a hotel migration adding the recommended indexes')
+
+    def handle(self, *args, **options):
+        self.repeat = max(options['repeat'], 1)
+        self.min_rows = options['min_rows']
+        self.tables = {
+            model._meta.db_table: model for model in apps.get_app_config('hotel').get_models()
+        }
+        self.db_tables = set(connection.introspection.table_names())
+        self.row_counts = {}
+        checks = hotel_pages.pages(options['only'])
+
+        # Pages can write (holds, sessions) and the trial indexes are DDL; all of it is rolled back
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            # Measure the views themselves, not the public page cache
+            CACHES={'default': NO_CACHE, 'shared': NO_CACHE}
+        ):
+            fixtures = self.fixtures()
+            statements = self.capture(fixtures, checks)
+            candidates = {}
+            shapes = {}
+            for sql, pages in statements.items():
+                problems = self.problems(sql)
+                if not problems:
+                    continue
+                shape = shapes.setdefault(query_shape(sql), {'sql': sql, 'pages': set(), 'count': 0,
+                                                             'problems': problems})
+                shape['pages'] |= pages
+                shape['count'] += 1
+                for key in self.recommend(sql, problems):
+                    candidates.setdefault(key, []).append(sql)
+
+            for shape in shapes.values():
+                found = '; '.join(f"{kind} {table}" if table else kind for kind, table in shape['problems'])
+                self.stdout.write(self.style.WARNING(
+                    f"{', '.join(sorted(shape['pages']))}: {found} ({shape['count']} query(s))"
+                ))
+                self.stdout.write(f"    {shape['sql'][:240]}")
+            self.stdout.write(
+                f"\n{len(statements)} distinct queries from {len(checks)} pages, "
+                f"{len(shapes)} query shape(s) flagged"
+            )
+            accepted, rejected = self.evaluate(self.merge_prefixes(candidates), options['min_gain_ms'])
+            transaction.set_rollback(True)
+
+        if rejected:
+            self.stdout.write('\nNot recommended:')
+            for model, index, queries, before, after, reason in rejected:
+                self.stdout.write(
+                    f"  {model.__name__}{list(index.fields)!r}: {reason} "
+                    f"({len(queries)} query(s), {before:.2f}ms -> {after:.2f}ms)"
+                )
+        if not accepted:
+            self.stdout.write(self.style.SUCCESS('\nNo indexes to recommend'))
+            return
+
+        self.stdout.write('\nRecommended indexes:')
+        for model, index, queries, before, after, reason in accepted:
+            self.stdout.write(self.style.SUCCESS(
+                f"  {model.__name__}: models.Index(fields={list(index.fields)!r}, name={index.name!r})"
+            ))
+            self.stdout.write(f"    {len(queries)} query(s): {before:.2f}ms -> {after:.2f}ms")
+
+        if options['write_migration']:
+            path = self.write_migration([(model, index) for model, index, *rest in accepted])
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {path}"))
+            self.stdout.write("Add the same indexes to each model's Meta.indexes so makemigrations stays clean.")
+
+    def problems(self, sql):
+        """Full scans and temporary sorts in the plan, ignoring tables under --min-rows"""
+        problems = []
+        from_table = re.search(r' FROM "(\w+)"', strip_subqueries(sql))
+        for kind, table in plan_problems(self.explain(sql), connection.vendor):
+            counted = table or (from_table.group(1) if from_table else None)
+            if counted and self.row_count(counted) >= self.min_rows:
+                problems.append((kind, table))
+        return problems
+
+    def merge_prefixes(self, candidates):
+        """Fold an index into a longer candidate on the same model that starts with its columns"""
+        merged = dict(candidates)
+        for model, fields in sorted(candidates, key=lambda key: len(key[1])):
+            columns = [field.lstrip('-') for field in fields]
+            for other_model, other_fields in merged:
+                other_columns = [field.lstrip('-') for field in other_fields]
+                if (other_model is model and len(other_fields) > len(fields)
+                        and other_columns[:len(columns)] == columns):
+                    merged[(other_model, other_fields)] += merged.pop((model, fields))
+                    break
+        return merged
+
+    def evaluate(self, candidates, min_gain_ms):
+        """
+        Try each candidate index on top of the ones already accepted, most
+        expensive queries first, and keep it only when it saves at least
+        min_gain_ms and a tenth of the time. Returns (accepted, rejected) lists
+        of (model, index, queries, before_ms, after_ms, reason).
+        """
+        timed = [
+            (self.time_queries(queries), model, fields, queries)
+            for (model, fields), queries in candidates.items()
+        ]
+        timed.sort(key=lambda entry: -entry[0])
+        accepted, rejected = [], []
+        for original, model, fields, queries in timed:
+            index = self.make_index(model, fields)
+            # Compare against the faster of both runs so timing noise cannot pass an index
+            base = min(self.time_queries(queries), original) if accepted else original
+            self.add_index(model, index)
+            after = self.time_queries(queries)
+            if base - after >= min_gain_ms and after <= base * 0.9:
+                accepted.append((model, index, queries, base, after, ''))
+                continue
+            self.remove_index(model, index)
+            covered = original - base >= min_gain_ms and base <= original * 0.9
+            reason = 'covered by an index above' if covered else 'no measurable gain'
+            rejected.append((model, index, queries, base, after, reason))
+        return accepted, rejected
+
+    def fixtures(self):
+        """Route fixtures from existing rows, logged in as the account with most bookings"""
+        busiest = Booking.objects.filter(user__isnull=False).values('user').annotate(
+            bookings=Count('id')
+        ).order_by('-bookings').first()
+        if busiest is None:
+            raise CommandError('No bookings linked to an account; run generate_dataset first')
+        booking = Booking.objects.select_related('room').filter(
+            user=busiest['user']
+        ).order_by('-id').first()
+        job = JobListing.objects.filter(is_active=True).first()
+        if job is None:
+            raise CommandError('No active job listings to analyse; run generate_dataset first')
+        # Promoted for the admin changelists; rolled back with everything else
+        user = User.objects.get(pk=busiest['user'])
+        user.is_staff = user.is_superuser = True
+        user.save(update_fields=['is_staff', 'is_superuser'])
+        return {
+            'user': user,
+            'booking': booking,
+            'room': booking.room,
+            'city': booking.room.city,
+            'room_type': booking.room.room_type,
+            'job': job,
+            'check_in': timezone.now().date() + timedelta(days=30),
+        }
+
+    def capture(self, fixtures, checks):
+        """{sql: {page names}} for every SELECT the pages run"""
+        statements = {}
+        for name, url in checks:
+            client = Client(raise_request_exception=False)
+            client.force_login(fixtures['user'])
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url(fixtures))
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if sql.lstrip().upper().startswith('SELECT'):
+                    statements.setdefault(sql, set()).add(name)
+        return statements
+
+    def explain(self, sql):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            rows = cursor.fetchall()
+        return [row[-1] for row in rows]
+
+    def row_count(self, table):
+        """Rows in a table; 0 for names that are not tables, such as subquery aliases"""
+        if table not in self.row_counts:
+            self.row_counts[table] = 0
+            if table in self.db_tables:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                    self.row_counts[table] = cursor.fetchone()[0]
+        return self.row_counts[table]
+
+    def recommend(self, sql, problems):
+        """
+        (model, fields) keys for the hotel tables behind the problems: columns
+        compared for equality first, then the ORDER BY columns for a temporary
+        sort, otherwise the first range-filtered column.
+        """
+        outer = strip_subqueries(sql)
+        where = clause(outer, ' WHERE ', [' GROUP BY ', ' HAVING ', ' ORDER BY ', ' LIMIT '])
+        order_by = clause(outer, ' ORDER BY ', [' LIMIT ', ' OFFSET '])
+        from_table = re.search(r' FROM "(\w+)"', outer)
+        sorted_tables = {from_table.group(1)} if from_table else set()
+
+        keys = []
+        for kind, table in problems:
+            tables = {table} if table else sorted_tables
+            for table in tables:
+                model = self.tables.get(table)
+                if model is None:
+                    continue
+                equality, ranges = [], []
+                for match in CONDITION.finditer(where):
+                    if match.group('table') != table:
+                        continue
+                    target = equality if match.group('op').upper() in EQUALITY_OPS else ranges
+                    if match.group('column') not in equality + ranges:
+                        target.append(match.group('column'))
+                columns = list(equality)
+                ordering = [
+                    (match.group('column'), (match.group('direction') or 'ASC').upper())
+                    for match in ORDER_COLUMN.finditer(order_by)
+                ]
+                ordered_here = [m.group('table') == table for m in ORDER_COLUMN.finditer(order_by)]
+                if kind == 'temp sort' and ordering and all(ordered_here):
+                    columns += [
+                        ('-' if direction == 'DESC' else '') + column
+                        for column, direction in ordering if column not in equality
+                    ]
+                elif ranges:
+                    columns.append(ranges[0])
+                fields = self.field_names(model, columns)
+                if fields and not self.covered(model, fields):
+                    keys.append((model, tuple(fields)))
+        return list(dict.fromkeys(keys))
+
+    def field_names(self, model, columns):
+        by_column = {field.column: field.name for field in model._meta.concrete_fields}
+        fields = []
+        for column in columns:
+            descending = column.startswith('-')
+            name = by_column.get(column.lstrip('-'))
+            if name is None:
+                return []
+            fields.append(('-' if descending else '') + name)
+        return fields
+
+    def covered(self, model, fields):
+        """True when an existing index already starts with these fields"""
+        wanted = [field.lstrip('-') for field in fields]
+        existing = [list(index.fields) for index in model._meta.indexes]
+        existing += [[field.name] for field in model._meta.concrete_fields if field.db_index or field.unique]
+        existing += [list(fields) for fields in model._meta.unique_together]
+        existing += [
+            list(constraint.fields) for constraint in model._meta.constraints
+            if isinstance(constraint, models.UniqueConstraint) and constraint.condition is None
+        ]
+        for index_fields in existing:
+            index_fields = [field.lstrip('-') for field in index_fields]
+            if index_fields[:len(wanted)] == wanted:
+                return True
+        return False
+
+    def make_index(self, model, fields):
+        short = '_'.join(field.lstrip('-').split('_')[0][:8] for field in fields)
+        name = f"{model._meta.model_name[:10]}_{short}"[:26].rstrip('_') + '_idx'
+        return models.Index(fields=list(fields), name=name)
+
+    def add_index(self, model, index):
+        # The editor is not entered as a context manager: SQLite refuses that
+        # inside atomic(), and CREATE/DROP INDEX need none of its table rebuilding
+        editor = connection.schema_editor(collect_sql=True)
+        with connection.cursor() as cursor:
+            cursor.execute(str(index.create_sql(model, editor)))
+
+    def remove_index(self, model, index):
+        editor = connection.schema_editor(collect_sql=True)
+        with connection.cursor() as cursor:
+            cursor.execute(str(index.remove_sql(model, editor)))
+
+    def time_queries(self, queries):
+        """Fastest of --repeat runs of every query, summed, in ms"""
+        total = 0
+        with connection.cursor() as cursor:
+            for sql in queries:
+                best = None
+                for _ in range(self.repeat):
+                    started = time.perf_counter()
+                    cursor.execute(sql)
+                    cursor.fetchall()
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                total += best
+        return total * 1000
+
+    def write_migration(self, indexes):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        leaf = loader.graph.leaf_nodes('hotel')[0]
+        number = int(leaf[1].split('_')[0]) + 1
+        migration = Migration(f'{number:04d}_advised_indexes', 'hotel')
+        migration.dependencies = [leaf]
+        migration.operations = [
+            AddIndex(model_name=model._meta.model_name, index=index) for model, index in indexes
+        ]
+        writer = MigrationWriter(migration)
+        with open(writer.path, 'w', encoding='utf-8') as file:
+            file.write(writer.as_string())
+        return writer.path
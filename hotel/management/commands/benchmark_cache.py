@@ -0,0 +1,138 @@
+# hotel/management/commands/benchmark_cache.py
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.core.management.commands.createcachetable import Command as CreateCacheTable
+from django.db import connection
+
+from hotel.sqlite_cache import SQLiteCache
+
+BACKENDS = ['locmem', 'database', 'shared']
+OPERATIONS = ['set', 'get', 'get_many', 'set_many', 'incr']
+# Keys read or written by each get_many / set_many call
+BATCH = 10
+
+
+class Command(BaseCommand):
+    help = ('Compare the shared SQLite cache with LocMemCache and DatabaseCache, '
+            'in one process and across several worker processes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=5000,
+                            help='Calls per operation, or per worker process (default: 5000)')
+        parser.add_argument('--keys', type=int, default=1000, help='Distinct keys (default: 1000)')
+        parser.add_argument('--value-size', type=int, default=2000,
+                            help='Bytes per cached value (default: 2000)')
+        parser.add_argument('--processes', type=int, default=4,
+                            help='Worker processes for the shared run (default: 4)')
+        parser.add_argument('--backend', action='append', choices=BACKENDS,
+                            help='Only benchmark this backend; repeat for several')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.value = os.urandom(options['value_size'])
+        self.directory = tempfile.mkdtemp(prefix='benchmark-cache-')
+        self.table = f'benchmark_cache_{os.getpid()}'
+        backends = options['backend'] or BACKENDS
+        try:
+            if 'database' in backends:
+                create_table = CreateCacheTable()
+                create_table.verbosity = 0
+                create_table.create_table('default', self.table, False)
+            self.stdout.write(f"Single process, {options['ops']} calls each (ops/s):")
+            self.stdout.write(f"  {'backend':<10}" + ''.join(f"{name:>12}" for name in OPERATIONS))
+            for backend in backends:
+                rates = self.single_process(backend)
+                self.stdout.write(f"  {backend:<10}" + ''.join(f"{rates[name]:>12,.0f}" for name in OPERATIONS))
+
+            self.stdout.write(
+                f"\n{options['processes']} processes reading through the cache, "
+                f"{options['ops']} gets each, a set on every miss:"
+            )
+            for backend in backends:
+                rate, hit_ratio = self.multi_process(backend)
+                self.stdout.write(f"  {backend:<10}{rate:>12,.0f} ops/s {hit_ratio:>8.1%} hits")
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            if 'database' in backends:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP TABLE {connection.ops.quote_name(self.table)}')
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def make_cache(self, backend, name):
+        # No entry is culled during a run
+        params = {'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': self.options['keys'] * 10}}
+        if backend == 'locmem':
+            return LocMemCache(name, params)
+        if backend == 'database':
+            return DatabaseCache(self.table, params)
+        return SQLiteCache(os.path.join(self.directory, f'{name}.sqlite3'), params)
+
+    def single_process(self, backend):
+        cache = self.make_cache(backend, f'single-{backend}')
+        cache.clear()
+        ops, keys = self.options['ops'], self.options['keys']
+        rng = random.Random(0)
+        names = [f'key-{rng.randrange(keys)}' for _ in range(ops)]
+        batches = [[f'key-{rng.randrange(keys)}' for _ in range(BATCH)] for _ in range(ops)]
+        cache.set('counter', 0)
+
+        calls = {
+            'set': lambda i: cache.set(names[i], self.value),
+            'get': lambda i: cache.get(names[i]),
+            'get_many': lambda i: cache.get_many(batches[i]),
+            'set_many': lambda i: cache.set_many({key: self.value for key in batches[i]}),
+            'incr': lambda i: cache.incr('counter'),
+        }
+        rates = {}
+        for operation in OPERATIONS:
+            started = time.perf_counter()
+            for i in range(ops):
+                calls[operation](i)
+            rates[operation] = ops / (time.perf_counter() - started)
+        cache.clear()
+        return rates
+
+    def multi_process(self, backend):
+        name = f'multi-{backend}'
+        self.make_cache(backend, name).clear()
+        # Children must not share the parent's database connection
+        connection.close()
+        context = multiprocessing.get_context('fork')
+        start = context.Event()
+        results = context.Queue()
+        workers = [
+            context.Process(target=self.worker, args=(backend, name, seed, start, results))
+            for seed in range(self.options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        started = time.perf_counter()
+        start.set()
+        hits = sum(results.get() for _ in workers)
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        total = self.options['ops'] * len(workers)
+        return total / elapsed, hits / total
+
+    def worker(self, backend, name, seed, start, results):
+        cache = self.make_cache(backend, name)
+        rng = random.Random(seed)
+        names = [f'key-{rng.randrange(self.options["keys"])}' for _ in range(self.options['ops'])]
+        start.wait()
+        hits = 0
+        for key in names:
+            if cache.get(key) is None:
+                cache.set(key, self.value)
+            else:
+                hits += 1
+        connection.close()
+        results.put(hits)
@@ -0,0 +1,208 @@
+# hotel/management/commands/benchmark_email.py
+import queue
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from hotel.availability import CANCELLED
+from hotel.models import Booking, ContactSubmission, OutboxMessage, Room
+from hotel.outbox import send_batch
+from hotel.smtp_sink import SMTPSink
+
+BENCHMARK_EMAIL = 'email-benchmark@abchotels.invalid'
+LOCAL_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+# How each mode handles the mail a request queues
+MODES = {
+    'outbox': 'queued; a background worker sends it',
+    'inline': 'sent before the response, as before the outbox',
+}
+
+
+def keys_of(queryset, prefix, suffixes):
+    """Subqueries of the outbox dedupe keys the views build from these rows' ids"""
+    return [
+        queryset.annotate(
+            key=Concat(Value(prefix), Cast('pk', CharField()), Value(suffix), output_field=CharField())
+        ).values('key')
+        for suffix in suffixes
+    ]
+
+
+def benchmark_outbox():
+    """
+    Outbox messages queued by the benchmark's own requests. Only these are
+    ever claimed or deleted, so real pending mail is left for send_outbox.
+    """
+    subqueries = keys_of(
+        Booking.objects.filter(guest_email=BENCHMARK_EMAIL), 'booking-',
+        ['-guest-confirmation', '-company-notification']
+    ) + keys_of(
+        ContactSubmission.objects.filter(email=BENCHMARK_EMAIL), 'contact-',
+        ['-auto-reply', '-hotel-notification']
+    )
+    condition = Q()
+    for subquery in subqueries:
+        condition |= Q(dedupe_key__in=subquery)
+    return OutboxMessage.objects.filter(condition)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive booking_confirmation and contact at a target request rate against a local '
+        'SMTP sink and report request latency percentiles with mail off and on the request path'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rps', type=float, default=20, help='Requests started per second (default: 20)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per mode (default: 200)')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients (default: 8)')
+        parser.add_argument('--latency-ms', type=float, default=100,
+                            help='SMTP sink delay per message (default: 100)')
+        parser.add_argument('--jitter-ms', type=float, default=0,
+                            help='Extra random SMTP delay of up to this many ms (default: 0)')
+        parser.add_argument('--failure-rate', type=float, default=0,
+                            help='Fraction of messages the sink refuses (default: 0)')
+        parser.add_argument('--mode', action='append', choices=list(MODES),
+                            help='Only run this mode; repeat for several (default: all)')
+
+    def handle(self, *args, **options):
+        room = Room.objects.filter(is_available=True).order_by('id').first()
+        if room is None:
+            raise CommandError('No available room to attach benchmark bookings to')
+
+        sink = SMTPSink(
+            port=0, latency_ms=options['latency_ms'], jitter_ms=options['jitter_ms'],
+            failure_rate=options['failure_rate'], seed=0
+        ).start()
+        self.stdout.write(
+            f"SMTP sink on port {sink.port}: {options['latency_ms']:g}ms per message, "
+            f"{options['failure_rate']:.0%} refused; {options['requests']} requests per mode "
+            f"at {options['rps']:g}/s from {options['threads']} clients"
+        )
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                EMAIL_HOST='127.0.0.1',
+                EMAIL_PORT=sink.port,
+                EMAIL_USE_TLS=False,
+                EMAIL_USE_SSL=False,
+                EMAIL_HOST_PASSWORD='',
+                # Keep the circuit breaker and page cache state of the real cache untouched
+                CACHES={'default': LOCAL_CACHE, 'shared': LOCAL_CACHE},
+            ):
+                for mode in options['mode'] or MODES:
+                    before = sink.stats.snapshot()
+                    latencies, drained = self.run_mode(mode, room, options)
+                    after = sink.stats.snapshot()
+                    self.report(mode, latencies, drained, after['accepted'] - before['accepted'])
+        finally:
+            sink.stop()
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def run_mode(self, mode, room, options):
+        count = options['requests']
+        check_in = timezone.now().date() + timedelta(days=3650)
+        # Cancelled, so the bookings take no inventory and are left out of digests
+        bookings = Booking.objects.bulk_create([
+            Booking(guest_name='Email Benchmark', guest_email=BENCHMARK_EMAIL, guest_phone='0',
+                    room=room, check_in=check_in, check_out=check_in + timedelta(days=2),
+                    status=CANCELLED)
+            for _ in range((count + 1) // 2)
+        ])
+        jobs = queue.Queue()
+        for i in range(count):
+            if i % 2:
+                jobs.put((i, 'contact', None))
+            else:
+                jobs.put((i, 'booking_confirmation', bookings[i // 2].pk))
+
+        latencies = {'booking_confirmation': [], 'contact': []}
+        lock = threading.Lock()
+        start = time.perf_counter() + 0.2
+        stop_worker = threading.Event()
+
+        def client_thread():
+            client = Client()
+            try:
+                while True:
+                    try:
+                        i, view, booking_id = jobs.get_nowait()
+                    except queue.Empty:
+                        return
+                    # Requests start on schedule whether or not earlier ones finished,
+                    # so time spent waiting for a free client counts as latency
+                    scheduled = start + i / options['rps']
+                    time.sleep(max(scheduled - time.perf_counter(), 0))
+                    if view == 'contact':
+                        client.post(reverse('contact'), {
+                            'name': 'Email Benchmark', 'email': BENCHMARK_EMAIL,
+                            'subject': 'Benchmark', 'message': f'Benchmark request {i}',
+                        })
+                    else:
+                        client.get(reverse('booking_confirmation', args=[booking_id]))
+                    if mode == 'inline':
+                        send_batch(queryset=benchmark_outbox())
+                    with lock:
+                        latencies[view].append((time.perf_counter() - scheduled) * 1000)
+            finally:
+                connection.close()
+
+        def worker_thread():
+            try:
+                while not stop_worker.is_set():
+                    sent, failed = send_batch(queryset=benchmark_outbox())
+                    if not (sent or failed):
+                        time.sleep(0.05)
+            finally:
+                connection.close()
+
+        worker = threading.Thread(target=worker_thread) if mode == 'outbox' else None
+        if worker:
+            worker.start()
+        clients = [threading.Thread(target=client_thread) for _ in range(options['threads'])]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+
+        while worker and benchmark_outbox().filter(
+            status=OutboxMessage.PENDING, attempts=0
+        ).exists():
+            time.sleep(0.05)
+        drained = time.perf_counter() - start
+        if worker:
+            stop_worker.set()
+            worker.join()
+
+        benchmark_outbox().delete()
+        ContactSubmission.objects.filter(email=BENCHMARK_EMAIL).delete()
+        Booking.objects.filter(pk__in=[booking.pk for booking in bookings]).delete()
+        return latencies, drained
+
+    def report(self, mode, latencies, drained, accepted):
+        self.stdout.write(f"\n{mode}: mail {MODES[mode]}")
+        self.stdout.write(f"  {'view':<22}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+        for view, values in latencies.items():
+            if values:
+                self.stdout.write(
+                    f"  {view:<22}" + ''.join(
+                        f"{percentile(values, fraction):>9.1f}" for fraction in (0.5, 0.9, 0.99)
+                    ) + f"{max(values):>9.1f}"
+                )
+        self.stdout.write(f"  {accepted} messages accepted by the sink; all mail out after {drained:.1f}s")
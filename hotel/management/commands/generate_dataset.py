@@ -0,0 +1,369 @@
+# hotel/management/commands/generate_dataset.py
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from hotel.inventory import rebuild_inventory
+from hotel.reference import bump_generations
+from hotel.models import (
+    Booking, City, ContactSubmission, Department, JobApplication, JobListing,
+    Room, RoomType, UserProfile
+)
+
+SYNTHETIC_PASSWORD = 'SyntheticPass123!'
+# Most days between booking a stay and checking in
+LEAD_DAYS = 90
+
+CITY_PARTS = [
+    'Ash', 'Bay', 'Bright', 'Cedar', 'Clear', 'Crown', 'East', 'Fair', 'Glen', 'Gold',
+    'Green', 'Harbor', 'High', 'Lake', 'Maple', 'Mill', 'North', 'Oak', 'Pine', 'Red',
+    'River', 'Rock', 'South', 'Spring', 'Stone', 'Sun', 'West', 'White', 'Wind', 'Wood',
+]
+CITY_SUFFIXES = ['ford', 'ton', 'ville', 'field', 'port', 'bridge', 'haven', 'wood', 'mouth', 'stead']
+ROOM_STYLES = ['Standard', 'Superior', 'Deluxe', 'Premier', 'Executive', 'Garden', 'Pool View',
+               'City View', 'Ocean View', 'Corner']
+ROOM_BEDS = [('King', 2), ('Queen', 2), ('Twin', 2), ('Double', 2), ('Family', 4), ('Suite', 3)]
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery',
+               'Quinn', 'Drew', 'Robin', 'Kim', 'Lee', 'Chris', 'Pat', 'Dana', 'Jesse', 'Rowan', 'Sky']
+LAST_NAMES = ['Smith', 'Chan', 'Garcia', 'Wong', 'Brown', 'Lee', 'Martin', 'Ng', 'Wilson', 'Lam',
+              'Taylor', 'Cheung', 'Davis', 'Ho', 'Clark', 'Li', 'Lewis', 'Yip', 'Walker', 'Tam']
+JOB_TITLES = ['Front Desk Agent', 'Housekeeper', 'Night Auditor', 'Concierge', 'Line Cook',
+              'Revenue Analyst', 'Maintenance Technician', 'Sales Manager', 'Bartender', 'Spa Therapist']
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a large, reproducible synthetic dataset for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cities', type=int, default=500, help='Cities to add (default: 500)')
+        parser.add_argument('--room-types', type=int, default=40, help='Room types to add (default: 40)')
+        parser.add_argument('--rooms', type=int, default=50000, help='Rooms to add (default: 50000)')
+        parser.add_argument('--bookings', type=int, default=5000000, help='Bookings to add (default: 5000000)')
+        parser.add_argument('--users', type=int, default=1000000, help='Users, each with a profile (default: 1000000)')
+        parser.add_argument('--contacts', type=int, default=100000,
+                            help='Contact submissions to add (default: 100000)')
+        parser.add_argument('--jobs', type=int, default=500, help='Job listings to add (default: 500)')
+        parser.add_argument('--applications', type=int, default=100000,
+                            help='Job applications to add (default: 100000)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--tag', help='Suffix that keeps names and emails unique; change it to '
+                                          'generate a second dataset with the same seed (default: s<seed>)')
+        parser.add_argument('--batch-size', type=int, default=20000,
+                            help='Rows per INSERT batch and per transaction (default: 20000)')
+        parser.add_argument('--skip-inventory', action='store_true',
+                            help='Do not rebuild RoomInventory after adding bookings')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        # Same seed and tag on an empty database give the same rows
+        self.tag = options['tag'] or f"s{options['seed']}"
+        if User.objects.filter(username=f"user-{self.tag}-0").exists():
+            raise CommandError(f"A dataset tagged {self.tag!r} already exists; pass another --tag")
+        self.counts = {}
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                # A bigger page cache keeps index pages in memory as the tables grow
+                cursor.execute('PRAGMA cache_size = -262144')
+                # Commits skip fsync for this connection only: a crash of the
+                # machine mid-run can lose the batches since the last checkpoint,
+                # which for a throwaway benchmark dataset is an acceptable trade
+                cursor.execute('PRAGMA synchronous = OFF')
+                cursor.execute('PRAGMA temp_store = MEMORY')
+        started = time.perf_counter()
+
+        # Every foreign key written below comes from rows this run just inserted,
+        # so per-row constraint checks at each commit only cost time
+        with connection.constraint_checks_disabled():
+            cities = self.timed('cities', self.create_cities, options['cities'])
+            room_types = self.timed('room types', self.create_room_types, options['room_types'])
+            if options['rooms'] and not (cities and room_types):
+                raise CommandError('Rooms need at least one new city and room type')
+            room_ids = self.timed('rooms', self.create_rooms, options['rooms'], cities, room_types)
+            if cities or room_types or room_ids:
+                # Bulk inserts send no signals, so mark the cached reference tables stale by hand
+                bump_generations('cities', 'room_types')
+            user_ids = self.timed('users', self.create_users, options['users'])
+            self.timed('user profiles', self.create_profiles, user_ids)
+            if options['bookings'] and not room_ids:
+                raise CommandError('Bookings need at least one new room')
+            self.timed('bookings', self.create_bookings, options['bookings'], room_ids, user_ids)
+            self.timed('contact submissions', self.create_contacts, options['contacts'])
+            jobs = self.timed('job listings', self.create_jobs, options['jobs'])
+            if options['applications'] and not jobs:
+                raise CommandError('Job applications need at least one new job listing')
+            self.timed('job applications', self.create_applications, options['applications'], jobs)
+        total = sum(self.counts.values())
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s), "
+            f"seed {options['seed']}"
+        ))
+
+        if options['bookings'] and not options['skip_inventory']:
+            # The raw inserts bypass the signals that keep RoomInventory current
+            self.timed('inventory rows', rebuild_inventory)
+
+    def timed(self, label, func, *args):
+        """Run one generation step and report its row rate"""
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        count = result if isinstance(result, int) else len(result)
+        self.counts[label] = count
+        self.stdout.write(f"  {label}: {count} in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+        return result
+
+    def insert_rows(self, model, columns, rows, count):
+        """
+        Insert `count` value tuples from an iterable with executemany, one
+        transaction per batch. Values must already be in database format.
+        Returns the row count. Model.save(), bulk_create() and signals are
+        bypassed for speed.
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        column_sql = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in columns)
+        sql = f"INSERT INTO {table} ({column_sql}) VALUES ({', '.join(['%s'] * len(columns))})"
+        inserted = 0
+        batch = []
+        with self.deferred_indexes(model, count):
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    inserted += self.flush(sql, batch)
+            inserted += self.flush(sql, batch)
+        return inserted
+
+    @contextmanager
+    def deferred_indexes(self, model, count):
+        """
+        On SQLite, drop the table's secondary indexes while adding more rows
+        than it already holds, and build them again afterwards. One sorted
+        index build is several times cheaper than keeping every index up to
+        date row by row. Unique constraints stay, so duplicates still fail.
+        """
+        if connection.vendor != 'sqlite' or count <= model.objects.count():
+            yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%'",
+                [model._meta.db_table]
+            )
+            indexes = cursor.fetchall()
+            for name, create_sql in indexes:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+        try:
+            yield
+        finally:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for name, create_sql in indexes:
+                    cursor.execute(create_sql)
+
+    def flush(self, sql, batch):
+        if not batch:
+            return 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        count = len(batch)
+        batch.clear()
+        return count
+
+    def new_ids(self, model, after_id):
+        return list(model.objects.filter(pk__gt=after_id).order_by('pk').values_list('pk', flat=True))
+
+    def last_id(self, model):
+        return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    def create_cities(self, count):
+        cities = []
+        for i in range(count):
+            name = self.rng.choice(CITY_PARTS) + self.rng.choice(CITY_SUFFIXES)
+            cities.append(City(
+                name=f"{name} {self.tag}-{i}",
+                description=f"Synthetic city {i} generated for benchmarking"
+            ))
+        with transaction.atomic():
+            return City.objects.bulk_create(cities, batch_size=self.batch_size)
+
+    def create_room_types(self, count):
+        room_types = []
+        for i in range(count):
+            bed, capacity = self.rng.choice(ROOM_BEDS)
+            room_types.append(RoomType(
+                name=f"{self.rng.choice(ROOM_STYLES)} {bed} {self.tag}-{i}",
+                description='Synthetic room type generated for benchmarking',
+                price_per_night=self.rng.randrange(79, 900),
+                capacity=capacity
+            ))
+        with transaction.atomic():
+            return RoomType.objects.bulk_create(room_types, batch_size=self.batch_size)
+
+    def create_rooms(self, count, cities, room_types):
+        if not count:
+            return []
+        after_id = self.last_id(Room)
+        city_ids = [city.pk for city in cities]
+        room_type_ids = [room_type.pk for room_type in room_types]
+        rng = self.rng
+        updated = connection.ops.adapt_datetimefield_value(self.now)
+        self.insert_rows(Room, ['city', 'room_type', 'is_available', 'image', 'updated_at'], (
+            (rng.choice(city_ids), rng.choice(room_type_ids), rng.random() > 0.02, '', updated)
+            for _ in range(count)
+        ), count)
+        return self.new_ids(Room, after_id)
+
+    def create_users(self, count):
+        if not count:
+            return []
+        after_id = self.last_id(User)
+        # Hashing is deliberately slow, so every synthetic user shares one hash
+        password = make_password(SYNTHETIC_PASSWORD)
+        joined = connection.ops.adapt_datetimefield_value(self.now)
+        rnd = self.rng.random
+        prefix = f"user-{self.tag}-"
+        first_count, last_count = len(FIRST_NAMES), len(LAST_NAMES)
+
+        def rows():
+            for i in range(count):
+                username = f"{prefix}{i}"
+                yield (
+                    username, f"{username}@example.com", password,
+                    FIRST_NAMES[int(rnd() * first_count)], LAST_NAMES[int(rnd() * last_count)], False, True, False, joined
+                )
+
+        self.insert_rows(User, [
+            'username', 'email', 'password', 'first_name', 'last_name',
+            'is_staff', 'is_active', 'is_superuser', 'date_joined'
+        ], rows(), count)
+        return self.new_ids(User, after_id)
+
+    def create_profiles(self, user_ids):
+        rnd = self.rng.random
+        return self.insert_rows(UserProfile, ['user', 'phone_number'], (
+            (user_id, 20000000 + int(rnd() * 80000000) if rnd() < 0.7 else None)
+            for user_id in user_ids
+        ), len(user_ids))
+
+    def create_bookings(self, count, room_ids, user_ids):
+        """
+        Back-to-back stays per room, starting a year ago, so rooms are never
+        double booked. Past stays are checked out, the rest confirmed, and a
+        few of each are cancelled. Guests are the synthetic users when any.
+        Each stay is booked at a random second of a day up to LEAD_DAYS
+        before its check-in, and at least a day before now.
+        """
+        if not count:
+            return 0
+        rng = self.rng
+        today = self.now.date()
+        # Timestamps are written as text in the connection's time zone, which
+        # every backend accepts; adapt_datetimefield_value per row would cost
+        # more than the insert itself
+        origin = timezone.make_naive(self.now, connection.timezone) if settings.USE_TZ else self.now
+        booked_days = [str(origin.date() - timedelta(days=n)) for n in range(366 + LEAD_DAYS + 1)]
+        seconds = [f"{n // 3600:02d}:{n // 60 % 60:02d}:{n % 60:02d}" for n in range(86400)]
+        per_room, extra = divmod(count, len(room_ids))
+        emails = [f"user-{self.tag}-{i}@example.com" for i in range(len(user_ids))] or ['guest@example.com']
+        user_ids = user_ids or [None]
+        names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+        dates = {}
+
+        phones = [f"+1-555-{n:04d}" for n in range(10000)]
+        # Hot loop: index with random() rather than choice()/randint(), which
+        # cost several times more per call
+        rnd = rng.random
+        name_count, email_count = len(names), len(emails)
+
+        def day(offset):
+            if offset not in dates:
+                dates[offset] = connection.ops.adapt_datefield_value(today + timedelta(days=offset))
+            return dates[offset]
+
+        def rows():
+            for position, room_id in enumerate(room_ids):
+                offset = -365 + int(rnd() * 7)
+                for _ in range(per_room + (position < extra)):
+                    nights = 1 + int(rnd() * 7)
+                    if rnd() < 0.05:
+                        status = 'cancelled'
+                    elif offset + nights <= 0:
+                        status = 'checked_out'
+                    else:
+                        status = 'confirmed'
+                    guest = int(rnd() * email_count)
+                    booked = offset - 1 - int(rnd() * LEAD_DAYS)
+                    if booked > -1:
+                        # Future stays were booked some time in the last LEAD_DAYS
+                        booked = -1 - int(rnd() * LEAD_DAYS)
+                    created = f"{booked_days[-booked]} {seconds[int(rnd() * 86400)]}"
+                    yield (
+                        names[int(rnd() * name_count)], emails[guest], user_ids[guest],
+                        phones[int(rnd() * 10000)], room_id, day(offset), day(offset + nights),
+                        1 + int(rnd() * 4), status, '', created, created
+                    )
+                    offset += nights + int(rnd() * 4)
+
+        return self.insert_rows(Booking, [
+            'guest_name', 'guest_email', 'user', 'guest_phone', 'room', 'check_in', 'check_out',
+            'total_guests', 'status', 'group_reference', 'created_at', 'updated_at'
+        ], rows(), count)
+
+    def create_contacts(self, count):
+        rng = self.rng
+        submitted = connection.ops.adapt_datetimefield_value(self.now)
+        return self.insert_rows(ContactSubmission, [
+            'name', 'email', 'subject', 'message', 'submitted_at', 'is_processed', 'notes'
+        ], (
+            (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"contact-{self.tag}-{i}@example.com",
+             'General Inquiry', 'Synthetic message generated for benchmarking', submitted,
+             rng.random() < 0.5, '')
+            for i in range(count)
+        ), count)
+
+    def create_jobs(self, count):
+        if not count:
+            return []
+        with transaction.atomic():
+            departments = Department.objects.bulk_create([
+                Department(name=f"Department {self.tag}-{i}", description='Synthetic department')
+                for i in range(max(count // 25, 1))
+            ])
+            jobs = [
+                JobListing(
+                    title=self.rng.choice(JOB_TITLES),
+                    department=self.rng.choice(departments),
+                    description='Synthetic job listing generated for benchmarking',
+                    requirements='None',
+                    job_type=self.rng.choice(JobListing.JOB_TYPE_CHOICES)[0],
+                    experience_level=self.rng.choice(JobListing.EXPERIENCE_CHOICES)[0],
+                    location='Anywhere'
+                )
+                for _ in range(count)
+            ]
+            return JobListing.objects.bulk_create(jobs, batch_size=self.batch_size)
+
+    def create_applications(self, count, jobs):
+        rng = self.rng
+        job_ids = [job.pk for job in jobs]
+        statuses = [status for status, label in JobApplication.STATUS_CHOICES]
+        applied = connection.ops.adapt_datetimefield_value(self.now)
+        return self.insert_rows(JobApplication, [
+            'job', 'first_name', 'last_name', 'email', 'phone', 'resume', 'cover_letter',
+            'status', 'applied_date'
+        ], (
+            (rng.choice(job_ids), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+             f"applicant-{self.tag}-{i}@example.com", f"+1-555-{rng.randrange(10000):04d}",
+             'resumes/synthetic.pdf', '', rng.choice(statuses), applied)
+            for i in range(count)
+        ), count)
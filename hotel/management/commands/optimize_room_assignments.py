@@ -0,0 +1,120 @@
+# hotel/management/commands/optimize_room_assignments.py
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from hotel.availability import CANCELLED
+from hotel.caching import bump_generations
+from hotel.models import Booking, Room, RoomHold
+from hotel.optimizer import orphan_nights, pack_group
+from hotel.reservations import lock_rooms
+
+
+class Command(BaseCommand):
+    help = 'Reassign future confirmed bookings between rooms of the same type and city to close unsellable gaps'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-stay', type=int, default=2,
+                            help='Gaps shorter than this many nights count as unsellable (default: 2)')
+        parser.add_argument('--city', type=int, help='Only optimize one city id')
+        parser.add_argument('--dry-run', action='store_true', help='Report the savings without saving anything')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        today = timezone.now().date()
+        min_stay = options['min_stay']
+
+        rooms = Room.objects.filter(is_available=True)
+        if options['city']:
+            rooms = rooms.filter(city_id=options['city'])
+
+        with transaction.atomic():
+            room_groups = defaultdict(list)
+            for room_id, city_id, room_type_id in rooms.values_list('id', 'city_id', 'room_type_id'):
+                room_groups[(city_id, room_type_id)].append(room_id)
+            room_group = {
+                room_id: group for group, room_ids in room_groups.items() for room_id in room_ids
+            }
+            # Keep new bookings out of these rooms while we shuffle them
+            lock_rooms(rooms)
+
+            fixed = defaultdict(lambda: defaultdict(list))
+            movable = defaultdict(list)
+            stays = Booking.objects.filter(
+                room__in=rooms,
+                check_out__gt=today
+            ).exclude(status=CANCELLED).values_list('id', 'room_id', 'check_in', 'check_out', 'status')
+            for booking_id, room_id, check_in, check_out, status in stays.iterator(chunk_size=5000):
+                group = room_group[room_id]
+                if status == 'confirmed' and check_in > today:
+                    movable[group].append((booking_id, room_id, check_in, check_out))
+                else:
+                    # Guests in house, legacy statuses and same-day arrivals stay put
+                    fixed[group][room_id].append((check_in, check_out))
+
+            # Guests in checkout expect the room they are holding
+            holds = RoomHold.objects.filter(
+                room__in=rooms,
+                expires_at__gt=timezone.now()
+            ).values_list('room_id', 'check_in', 'check_out')
+            for room_id, check_in, check_out in holds:
+                fixed[room_group[room_id]][room_id].append((check_in, check_out))
+
+            before_total = after_total = skipped = 0
+            changes = []
+            now = timezone.now()
+            for group, room_ids in room_groups.items():
+                if not movable[group]:
+                    continue
+                before = self.wasted_nights(room_ids, fixed[group], movable[group], None, min_stay)
+                assignment = pack_group(room_ids, fixed[group], movable[group], min_stay)
+                if assignment is None:
+                    skipped += 1
+                    before_total += before
+                    after_total += before
+                    continue
+                after = self.wasted_nights(room_ids, fixed[group], movable[group], assignment, min_stay)
+                before_total += before
+                if after >= before:
+                    after_total += before
+                    continue
+                after_total += after
+                for booking_id, room_id, check_in, check_out in movable[group]:
+                    if assignment[booking_id] != room_id:
+                        changes.append(Booking(id=booking_id, room_id=assignment[booking_id], updated_at=now))
+
+            moved = len(changes)
+            if changes and not options['dry_run']:
+                # Same city and room type, so the inventory does not change. bulk_update
+                # skips auto_now and the signals, so touch updated_at for the conditional
+                # GET state and invalidate cached availability here.
+                Booking.objects.bulk_update(changes, ['room', 'updated_at'], batch_size=1000)
+                bump_generations('availability')
+
+        elapsed = time.perf_counter() - started
+        total_movable = sum(len(bookings) for bookings in movable.values())
+        self.stdout.write(
+            f"Checked {total_movable} future confirmed bookings in {len(room_groups)} "
+            f"room type/city groups in {elapsed:.2f}s"
+        )
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"{skipped} group(s) left unchanged: packing clashed with fixed stays"
+            ))
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {moved} booking(s); unsellable room-nights {before_total} -> {after_total} "
+            f"({before_total - after_total} recovered)"
+        ))
+
+    def wasted_nights(self, room_ids, fixed, movable, assignment, min_stay):
+        schedule = defaultdict(list)
+        for room_id, stays in fixed.items():
+            schedule[room_id].extend(stays)
+        for booking_id, room_id, check_in, check_out in movable:
+            target = assignment[booking_id] if assignment else room_id
+            schedule[target].append((check_in, check_out))
+        return sum(orphan_nights(schedule[room_id], min_stay) for room_id in room_ids)
@@ -0,0 +1,35 @@
+# hotel/management/commands/rebuild_inventory.py
+from django.core.management.base import BaseCommand
+
+from hotel.inventory import inventory_drift, rebuild_inventory
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the RoomInventory table from Booking and Room rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift between the stored table and the bookings, do not rewrite it',
+        )
+
+    def handle(self, *args, **options):
+        drift = inventory_drift()
+        if drift:
+            self.stdout.write(self.style.WARNING(f"Inventory drift found on {len(drift)} night(s):"))
+            for city_id, room_type_id, night, stored, expected in drift[:20]:
+                self.stdout.write(
+                    f"  city={city_id} room_type={room_type_id} night={night} "
+                    f"stored={stored} expected={expected}"
+                )
+            if len(drift) > 20:
+                self.stdout.write(f"  ... and {len(drift) - 20} more")
+        else:
+            self.stdout.write(self.style.SUCCESS("Inventory is in sync with bookings"))
+
+        if options['check']:
+            return
+
+        rows = rebuild_inventory()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt inventory: {rows} night rows written"))
@@ -0,0 +1,44 @@
+# hotel/management/commands/send_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from hotel.digests import queue_digest
+from hotel.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = ('Send queued outbox emails in batches, one SMTP connection per batch, '
+            'queueing the notification digest when one is due')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Messages sent per SMTP connection (default: 50)')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds to wait when nothing is due (default: 5)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once nothing is due instead of waiting for more, e.g. from cron')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        try:
+            while True:
+                # Digest mode: summarize the last complete window for the hotel inbox
+                queue_digest()
+                sent, failed = send_batch(options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}")
+                    continue
+                if options['once']:
+                    break
+                # A long-running worker should not hold on to a stale connection
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {total_sent} message(s), {total_failed} failed attempt(s)"
+        ))
@@ -0,0 +1,50 @@
+# hotel/management/commands/smtp_sink.py
+import threading
+
+from django.core.management.base import BaseCommand
+
+from hotel.smtp_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local SMTP server that accepts and counts messages without delivering them. '
+        'Point EMAIL_HOST/EMAIL_PORT at it with EMAIL_USE_TLS = False.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=1025, help='Port to listen on (default: 1025)')
+        parser.add_argument('--latency-ms', type=float, default=0,
+                            help='Delay before each message is answered (default: 0)')
+        parser.add_argument('--jitter-ms', type=float, default=0,
+                            help='Extra random delay of up to this many ms (default: 0)')
+        parser.add_argument('--failure-rate', type=float, default=0,
+                            help='Fraction of messages refused with a 451 error (default: 0)')
+        parser.add_argument('--report-interval', type=float, default=10,
+                            help='Seconds between counter reports (default: 10)')
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(
+            options['host'], options['port'], options['latency_ms'], options['jitter_ms'],
+            options['failure_rate']
+        ).start()
+        self.stdout.write(self.style.SUCCESS(
+            f"SMTP sink listening on {options['host']}:{sink.port}; Ctrl-C to stop"
+        ))
+        stopped = threading.Event()
+        try:
+            while not stopped.wait(options['report_interval']):
+                self.report(sink)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.stop()
+        self.report(sink)
+
+    def report(self, sink):
+        stats = sink.stats.snapshot()
+        self.stdout.write(
+            f"{stats['accepted']} accepted, {stats['rejected']} refused, "
+            f"{stats['recipients']} recipients, {stats['bytes']:,} bytes over {stats['connections']} connections"
+        )
@@ -0,0 +1,12 @@
+# hotel/management/commands/sweep_holds.py
+from django.core.management.base import BaseCommand
+
+from hotel.holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Delete expired checkout holds in one batched DELETE'
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f"Swept {deleted} expired hold(s)"))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0005_contactsubmission"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["room", "check_in", "check_out"], name="booking_room_stay_idx"
+            ),
+        ),
+    ]
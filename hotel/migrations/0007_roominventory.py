@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0006_booking_room_stay_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomInventory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("night", models.DateField()),
+                ("sold", models.IntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                (
+                    "city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory",
+                        to="hotel.city",
+                    ),
+                ),
+                (
+                    "room_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory",
+                        to="hotel.roomtype",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Room Inventory",
+                "verbose_name_plural": "Room Inventory",
+                "ordering": ["night"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="roominventory",
+            constraint=models.UniqueConstraint(
+                fields=("city", "room_type", "night"), name="unique_inventory_night"
+            ),
+        ),
+    ]
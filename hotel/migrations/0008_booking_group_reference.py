@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0007_roominventory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="group_reference",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Shared by all bookings made together as one group booking",
+                max_length=32,
+            ),
+        ),
+    ]
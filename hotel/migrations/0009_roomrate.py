@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0008_booking_group_reference"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("night", models.DateField()),
+                ("price", models.DecimalField(decimal_places=2, max_digits=8)),
+                (
+                    "city",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Leave empty to apply the rate in every city",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="room_rates",
+                        to="hotel.city",
+                    ),
+                ),
+                (
+                    "room_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rates",
+                        to="hotel.roomtype",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["night"],
+                "indexes": [
+                    models.Index(
+                        fields=["room_type", "night"], name="room_rate_night_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="roomrate",
+            constraint=models.UniqueConstraint(
+                fields=("room_type", "city", "night"), name="unique_city_room_rate"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="roomrate",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("city__isnull", True)),
+                fields=("room_type", "night"),
+                name="unique_default_room_rate",
+            ),
+        ),
+    ]
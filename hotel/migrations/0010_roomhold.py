@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0009_roomrate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("session_key", models.CharField(max_length=40)),
+                ("check_in", models.DateField()),
+                ("check_out", models.DateField()),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="holds",
+                        to="hotel.room",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["room", "check_in", "check_out"],
+                        name="hold_room_stay_idx",
+                    ),
+                    models.Index(fields=["session_key"], name="hold_session_idx"),
+                    models.Index(fields=["expires_at"], name="hold_expires_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0010_roomhold"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["guest_email", "-created_at"], name="booking_guest_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="booking_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="roominventory",
+            index=models.Index(fields=["night", "-id"], name="inventory_night_idx"),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("hotel", "0011_advised_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                help_text="Account that made the booking; empty for guest checkouts",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="bookings",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["user", "-created_at"], name="booking_user_created_idx"
+            ),
+        ),
+    ]
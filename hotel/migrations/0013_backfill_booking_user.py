@@ -0,0 +1,69 @@
+from django.db import migrations, transaction
+
+# Bookings updated per transaction, so the write lock is only held briefly
+CHUNK_SIZE = 2000
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def link_bookings_to_users(apps, schema_editor):
+    """
+    Point existing bookings at the account whose email matches the guest
+    email, ignoring case and surrounding spaces. Emails shared by several
+    accounts are ambiguous and left unlinked.
+    """
+    Booking = apps.get_model("hotel", "Booking")
+    User = apps.get_model("auth", "User")
+    db_alias = schema_editor.connection.alias
+
+    user_by_email = {}
+    users = User.objects.using(db_alias).values_list("id", "email")
+    for user_id, email in users.iterator():
+        email = normalize_email(email)
+        if email:
+            user_by_email[email] = None if email in user_by_email else user_id
+
+    connection = schema_editor.connection
+    # Plain executemany: bulk_update spends far longer building its CASE
+    # expression in Python than the database spends running it
+    update_sql = "UPDATE %s SET %s = %%s WHERE %s = %%s" % (
+        schema_editor.quote_name(Booking._meta.db_table),
+        schema_editor.quote_name(Booking._meta.get_field("user").column),
+        schema_editor.quote_name(Booking._meta.pk.column),
+    )
+    last_id = 0
+    while True:
+        chunk = list(
+            Booking.objects.using(db_alias)
+            .filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "guest_email", "user_id")[:CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        # Filtering user_id in SQL would make the planner pick the
+        # (user, created_at) index and re-sort every unlinked row per chunk
+        linked = [
+            (user_by_email[normalize_email(email)], pk)
+            for pk, email, user_id in chunk
+            if user_id is None and user_by_email.get(normalize_email(email))
+        ]
+        if linked:
+            with transaction.atomic(using=db_alias), connection.cursor() as cursor:
+                cursor.executemany(update_sql, linked)
+
+
+class Migration(migrations.Migration):
+    # Each chunk commits on its own instead of one long transaction
+    atomic = False
+
+    dependencies = [
+        ("hotel", "0012_booking_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(link_bookings_to_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0013_backfill_booking_user"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="booking",
+            name="booking_user_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="booking_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 13:15
+
+from django.db import migrations, models
+
+
+def create_generations(apps, schema_editor):
+    # Created up front so bumping a generation is always a single UPDATE
+    ReferenceGeneration = apps.get_model("hotel", "ReferenceGeneration")
+    for name in ("cities", "room_types"):
+        ReferenceGeneration.objects.using(schema_editor.connection.alias).get_or_create(
+            name=name
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0015_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferenceGeneration",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("generation", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_generations, migrations.RunPython.noop),
+    ]
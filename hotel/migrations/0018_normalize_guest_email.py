@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 14:02
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+import hotel.models
+
+
+def normalize_guest_emails(apps, schema_editor):
+    """Trim and lowercase the guest emails written before GuestEmailField"""
+    Booking = apps.get_model("hotel", "Booking")
+    normalized = Lower(Trim("guest_email"))
+    Booking.objects.using(schema_editor.connection.alias).exclude(
+        guest_email=normalized
+    ).update(guest_email=normalized)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0017_outbox_message"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="booking",
+            name="guest_email",
+            field=hotel.models.GuestEmailField(max_length=254),
+        ),
+        migrations.RunPython(normalize_guest_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("user__isnull", True)),
+                fields=["guest_email"],
+                name="booking_unclaimed_email_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.7 on 2026-10-17 14:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hotel", "0018_normalize_guest_email"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="booking",
+            name="booking_guest_created_idx",
+        ),
+    ]
@@ -1,11 +1,29 @@
 # hotel/models.py
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+class GuestEmailField(models.EmailField):
+    """
+    EmailField that is always written trimmed and lowercased, by save(),
+    bulk_create() and update() alike, so lookups can match it exactly
+    """
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        return normalize_email(value) if value else value
+
+
 # Add UserProfile model at the top
 class UserProfile(models.Model):
     user = models.OneToOneField(
@@ -40,6 +58,24 @@ def manage_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.get_or_create(user=instance)
     # No else clause needed - the inline in admin handles updates
 
+@receiver(user_logged_in)
+def claim_guest_bookings(sender, request, user, **kwargs):
+    """
+    Link bookings made while logged out with this account's email, ignoring
+    case and surrounding spaces, as migration 0013 did. An email shared by
+    several accounts is ambiguous and its bookings are left unlinked.
+    """
+    email = normalize_email(user.email)
+    if not email:
+        return
+    # Guest emails are stored normalized, so this is an exact, indexed match
+    unclaimed = Booking.objects.filter(guest_email=email, user__isnull=True)
+    if not unclaimed.exists():
+        return
+    if User.objects.filter(email__iexact=email).exclude(pk=user.pk).exists():
+        return
+    unclaimed.update(user=user)
+
 # NEW: Contact Submission Model
 class ContactSubmission(models.Model):
     name = models.CharField(max_length=100)
@@ -65,6 +101,7 @@ class City(models.Model):
     description = models.TextField()
     image = models.ImageField(upload_to='images/city/', null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -76,6 +113,7 @@ class City(models.Model):
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -89,6 +127,7 @@ class RoomType(models.Model):
     price_per_night = models.DecimalField(max_digits=8, decimal_places=2)
     capacity = models.PositiveIntegerField()
     image = models.ImageField(upload_to='images/room/', null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -96,16 +135,103 @@ class RoomType(models.Model):
     class Meta:
         ordering = ['name']
 
+class RoomRate(models.Model):
+    """
+    Price of a room type for a single night, overriding price_per_night.
+    A rate without a city applies everywhere; a city rate wins over it.
+    """
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='rates')
+    city = models.ForeignKey(City, on_delete=models.CASCADE, null=True, blank=True,
+    related_name='room_rates', help_text="Leave empty to apply the rate in every city")
+    night = models.DateField()
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        where = self.city.name if self.city else 'All cities'
+        return f"{self.room_type.name} - {where} - {self.night}: ${self.price}"
+
+    class Meta:
+        ordering = ['night']
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'city', 'night'],
+            name='unique_city_room_rate'),
+            models.UniqueConstraint(fields=['room_type', 'night'],
+            condition=models.Q(city__isnull=True), name='unique_default_room_rate'),
+        ]
+        indexes = [
+            models.Index(fields=['room_type', 'night'], name='room_rate_night_idx'),
+        ]
+
 class Room(models.Model):
     city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='rooms')
     room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE)
     is_available = models.BooleanField(default=True)
     image = models.ImageField(upload_to='images/room_specific/', blank=True,
     null=True, verbose_name='Room Specific Image')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.room_type.name} - {self.city.name}"
 
+class StayNights(models.Func):
+    """Whole nights from the second date expression to the first, as an integer"""
+    arity = 2
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+    output_field = models.IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(', **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, function='DATEDIFF', template='%(function)s(%(expressions)s)',
+            arg_joiner=', ', **extra_context
+        )
+
+
+class BookingQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotate nights, total_price and display_guests in SQL, so lists can
+        show and sort by them without per-row work. total_price applies
+        RoomRate overrides the same way hotel.pricing does: a city rate wins
+        over a rate for all cities, which wins over price_per_night.
+        """
+        city_rate = RoomRate.objects.filter(
+            room_type=models.OuterRef('room_type'),
+            night=models.OuterRef('night'),
+            city=models.OuterRef(models.OuterRef('room__city'))
+        )
+        adjustment = RoomRate.objects.filter(
+            room_type=models.OuterRef('room__room_type'),
+            night__gte=models.OuterRef('check_in'),
+            night__lt=models.OuterRef('check_out')
+        ).filter(
+            models.Q(city=models.OuterRef('room__city')) |
+            models.Q(city__isnull=True) & ~models.Exists(city_rate)
+        ).order_by().values('room_type').annotate(
+            total=models.Sum(models.F('price') - models.F('room_type__price_per_night'))
+        ).values('total')
+        price = models.DecimalField(max_digits=10, decimal_places=2)
+        return self.annotate(
+            nights=StayNights('check_out', 'check_in'),
+            total_price=models.ExpressionWrapper(
+                models.F('room__room_type__price_per_night') * models.F('nights') +
+                Coalesce(models.Subquery(adjustment, output_field=price), models.Value(Decimal('0'))),
+                output_field=price
+            ),
+            display_guests=models.Case(
+                models.When(total_guests__gt=1, then=models.F('total_guests')),
+                default=models.F('room__room_type__capacity')
+            )
+        )
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('confirmed', 'Confirmed'),
@@ -115,8 +241,12 @@ class Booking(models.Model):
     ]
 
     guest_name = models.CharField(max_length=100)
-    guest_email = models.EmailField()
+    guest_email = GuestEmailField()
     guest_phone = models.CharField(max_length=20)
+    # Indexed together with created_at and id below, which serves user lookups too
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+    related_name='bookings', db_index=False,
+    help_text="Account that made the booking; empty for guest checkouts")
     room = models.ForeignKey(Room, on_delete=models.CASCADE,
     related_name='bookings')
     check_in = models.DateField()
@@ -124,15 +254,25 @@ class Booking(models.Model):
     total_guests = models.PositiveIntegerField(default=1)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES,
     default='confirmed')
+    group_reference = models.CharField(max_length=32, blank=True, db_index=True,
+    help_text="Shared by all bookings made together as one group booking")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     def __str__(self):
         return f'Booking {self.id} - {self.guest_name} - {self.room}'
 
+    # The properties below return the values annotated by
+    # BookingQuerySet.with_totals() when the booking was loaded with them;
+    # the setters are what receive those annotations.
+
     @property
     def display_guests(self):
         """Return the actual number of guests, using room capacity for old bookings"""
+        if getattr(self, '_display_guests', None) is not None:
+            return self._display_guests
         # For new bookings with actual guest count, use total_guests
         # For old bookings where total_guests=1 (default), use room capacity
         if self.total_guests > 1:
@@ -140,21 +280,150 @@ class Booking(models.Model):
         else:
             return self.room.room_type.capacity
 
+    @display_guests.setter
+    def display_guests(self, value):
+        self._display_guests = value
+
     @property
     def total_price(self):
+        if getattr(self, '_total_price', None) is not None:
+            return self._total_price
         if self.check_in and self.check_out and self.room:
-            nights = (self.check_out - self.check_in).days
-            return nights * self.room.room_type.price_per_night
+            from .pricing import price_stay
+            return price_stay(self.room.room_type, self.check_in, self.check_out,
+                              city_id=self.room.city_id)
         return 0
 
+    @total_price.setter
+    def total_price(self, value):
+        # SQLite returns computed decimals unscaled, e.g. 512 for 512.00
+        self._total_price = None if value is None else Decimal(value).quantize(Decimal('0.01'))
+
     @property
     def nights(self):
+        if getattr(self, '_nights', None) is not None:
+            return self._nights
         if self.check_in and self.check_out:
             return (self.check_out - self.check_in).days
         return 0
 
+    @nights.setter
+    def nights(self, value):
+        self._nights = value
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['room', 'check_in', 'check_out'], name='booking_room_stay_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='booking_user_created_idx'),
+            # Guest bookings waiting to be claimed at login
+            models.Index(fields=['guest_email'], name='booking_unclaimed_email_idx',
+                         condition=models.Q(user__isnull=True)),
+            models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+        ]
+
+class RoomHold(models.Model):
+    """
+    Short-lived hold on a room while a guest fills in the booking form.
+    Active holds count against availability; see hotel.holds.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='holds')
+    session_key = models.CharField(max_length=40)
+    check_in = models.DateField()
+    check_out = models.DateField()
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Hold on {self.room_id} {self.check_in} - {self.check_out} until {self.expires_at}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'check_in', 'check_out'], name='hold_room_stay_idx'),
+            models.Index(fields=['session_key'], name='hold_session_idx'),
+            models.Index(fields=['expires_at'], name='hold_expires_idx'),
+        ]
+
+class RoomInventory(models.Model):
+    """
+    Materialized per-night inventory for a room type in a city.
+    Maintained incrementally by hotel.inventory; rebuild with
+    `python manage.py rebuild_inventory`.
+    """
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='inventory')
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE,
+    related_name='inventory')
+    night = models.DateField()
+    sold = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.room_type.name} - {self.city.name} - {self.night}: {self.sold}/{self.total}"
+
+    @property
+    def free(self):
+        return max(self.total - self.sold, 0)
+
+    class Meta:
+        ordering = ['night']
+        verbose_name = 'Room Inventory'
+        verbose_name_plural = 'Room Inventory'
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'room_type', 'night'],
+            name='unique_inventory_night'),
+        ]
+        indexes = [
+            models.Index(fields=['night', '-id'], name='inventory_night_idx'),
+        ]
+
+class ReferenceGeneration(models.Model):
+    """
+    Change counter of a reference table cached in every process by
+    hotel.reference. Bumped whenever the table changes, so each process
+    can tell with one small query whether its copy is stale.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    generation = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.generation}"
+
+class OutboxMessage(models.Model):
+    """
+    Email waiting to be sent by `python manage.py send_outbox`.
+    Views enqueue messages through hotel.outbox instead of talking to SMTP.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    dedupe_key = models.CharField(max_length=200, unique=True,
+    help_text="Enqueueing a message with a key already in the outbox does nothing")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
 
 class FAQ(models.Model):
     CATEGORY_CHOICES = [
@@ -171,6 +440,7 @@ class FAQ(models.Model):
     default='general')
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.question
@@ -207,6 +477,7 @@ class JobListing(models.Model):
     is_active = models.BooleanField(default=True)
     posted_date = models.DateTimeField(auto_now_add=True)
     application_deadline = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} - {self.department.name}"
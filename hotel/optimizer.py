@@ -0,0 +1,91 @@
+# hotel/optimizer.py
+import bisect
+from datetime import date, timedelta
+
+
+def orphan_nights(intervals, min_stay):
+    """
+    Nights left empty between consecutive stays in one room that are too
+    short to sell (fewer than min_stay nights). intervals: (check_in, check_out).
+    """
+    wasted = 0
+    last_out = None
+    for check_in, check_out in sorted(intervals):
+        if last_out is not None:
+            gap = (check_in - last_out).days
+            if 0 < gap < min_stay:
+                wasted += gap
+        last_out = check_out if last_out is None else max(last_out, check_out)
+    return wasted
+
+
+def pack_group(room_ids, fixed, movable, min_stay=2):
+    """
+    Greedy interval packing for the rooms of one room type in one city.
+
+    fixed maps room_id -> [(check_in, check_out)] that must stay where they are;
+    movable is a list of (booking_id, current_room_id, check_in, check_out).
+    Stays are swept by check-in date. Each movable stay goes, in order of
+    preference, to a room freed exactly on its check-in, then to the room
+    leaving the shortest gap that can still be sold (min_stay nights or
+    more), and only then to a room it would leave an unsellable gap in.
+    Within a tier ties keep the current room. Room end times live in a
+    sorted list, so the sweep is O(n log n) for n stays.
+
+    Returns {booking_id: room_id}, or None if some stay cannot be placed
+    without clashing with a fixed stay.
+    """
+    events = []
+    for room_id, stays in fixed.items():
+        for check_in, check_out in stays:
+            # Fixed stays sort before movable ones starting the same day
+            events.append((check_in, 0, check_out, room_id, None))
+    for booking_id, current_room_id, check_in, check_out in movable:
+        events.append((check_in, 1, check_out, current_room_id, booking_id))
+    events.sort(key=lambda event: event[:2])
+
+    # Fixed stays not yet swept, per room, soonest last
+    upcoming = {room_id: sorted(fixed.get(room_id, []), reverse=True) for room_id in room_ids}
+    room_end = {room_id: date.min for room_id in room_ids}
+    ends = sorted((date.min, room_id) for room_id in room_ids)
+
+    def move_end(room_id, new_end):
+        ends.pop(bisect.bisect_left(ends, (room_end[room_id], room_id)))
+        room_end[room_id] = new_end
+        bisect.insort(ends, (new_end, room_id))
+
+    def fits(room_id, check_out):
+        stays = upcoming.get(room_id)
+        return stays is not None and (not stays or stays[-1][0] >= check_out)
+
+    def latest_free_room(low, high, check_out, current_room_id):
+        """Room with the latest end in [low, high] that fits, preferring the current room"""
+        position = bisect.bisect_right(ends, (high, float('inf'))) - 1
+        while position >= 0 and ends[position][0] >= low:
+            end, candidate = ends[position]
+            if fits(candidate, check_out):
+                if room_end.get(current_room_id) == end and fits(current_room_id, check_out):
+                    return current_room_id
+                return candidate
+            position -= 1
+        return None
+
+    assignment = {}
+    for check_in, kind, check_out, room_id, booking_id in events:
+        if kind == 0:
+            upcoming[room_id].pop()
+            if check_out > room_end[room_id]:
+                move_end(room_id, check_out)
+            continue
+
+        sellable_gap = check_in - timedelta(days=min_stay)
+        chosen = (
+            latest_free_room(check_in, check_in, check_out, room_id) or
+            latest_free_room(date.min, sellable_gap, check_out, room_id) or
+            latest_free_room(sellable_gap + timedelta(days=1), check_in, check_out, room_id)
+        )
+        if chosen is None:
+            return None
+        assignment[booking_id] = chosen
+        move_end(chosen, check_out)
+    return assignment
@@ -0,0 +1,135 @@
+# hotel/outbox.py
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.utils import timezone
+
+from . import mailer
+from .models import OutboxMessage
+
+# Failed attempts after which a message is marked failed and left alone
+MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+# Delay before the first retry; it doubles with every further failure
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 6 * 60 * 60
+# How long a worker owns the messages it claimed; after that they are due again,
+# in case the worker died mid-batch
+CLAIM_SECONDS = 5 * 60
+
+
+def message(dedupe_key, subject, body, recipients, from_email=None, html_body=''):
+    """Unsaved outbox message, for enqueue()"""
+    return OutboxMessage(
+        dedupe_key=dedupe_key,
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
+def enqueue(*messages):
+    """
+    Queue messages for `python manage.py send_outbox` with one INSERT.
+    A message whose dedupe_key is already queued or sent is skipped, so
+    repeating a request queues nothing new.
+    """
+    OutboxMessage.objects.bulk_create(messages, ignore_conflicts=True)
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    # Jitter spreads out the retries of messages that failed together
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_batch(batch_size, queryset=None):
+    """
+    Take up to batch_size due messages for this worker, oldest first,
+    from queryset if given and the whole outbox otherwise
+    """
+    now = timezone.now()
+    queryset = queryset if queryset is not None else OutboxMessage.objects.all()
+    due = queryset.filter(status=OutboxMessage.PENDING, next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Rows another worker claimed in the meantime are no longer due and are skipped
+    due.filter(pk__in=ids).update(
+        claimed_by=token, next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)
+    )
+    return list(OutboxMessage.objects.filter(pk__in=ids, claimed_by=token).order_by('id'))
+
+
+def record_failure(message, error):
+    message.attempts += 1
+    message.last_error = f"{type(error).__name__}: {error}"
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = OutboxMessage.FAILED
+    else:
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+    message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        # Every message is already recorded as sent or failed
+        pass
+
+
+def send_batch(batch_size=50, connection=None, queryset=None):
+    """
+    Send up to batch_size due messages over one reused SMTP connection.
+    Failed messages are retried later with exponential backoff. Nothing is
+    claimed while the SMTP circuit breaker is open, and what is left of a
+    batch when it opens waits for the breaker without using an attempt.
+    queryset limits which messages may be claimed. Returns (sent, failed).
+    """
+    if mailer.breaker_state() == mailer.OPEN:
+        return 0, 0
+    messages = claim_batch(batch_size, queryset)
+    if not messages:
+        return 0, 0
+    connection = connection or mailer.connection()
+    sent = failed = 0
+    try:
+        for position, message in enumerate(messages):
+            email = EmailMultiAlternatives(
+                message.subject, message.body, message.from_email, message.recipients,
+                connection=connection,
+            )
+            if message.html_body:
+                email.attach_alternative(message.html_body, 'text/html')
+            try:
+                mailer.deliver(email)
+            except mailer.MailUnavailable:
+                release([message.pk for message in messages[position:]])
+                break
+            except Exception as e:
+                record_failure(message, e)
+                failed += 1
+                # The connection may be broken; the next message opens a new one
+                close_quietly(connection)
+            else:
+                message.status = OutboxMessage.SENT
+                message.sent_at = timezone.now()
+                message.attempts += 1
+                message.last_error = ''
+                message.save(update_fields=['status', 'sent_at', 'attempts', 'last_error'])
+                sent += 1
+    finally:
+        close_quietly(connection)
+    return sent, failed
+
+
+def release(ids):
+    """Hand claimed messages back, due again when the circuit breaker lets a probe through"""
+    due = timezone.now() + timedelta(seconds=mailer.reopens_in() or 0)
+    OutboxMessage.objects.filter(pk__in=ids).update(claimed_by='', next_attempt_at=due)
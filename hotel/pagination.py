@@ -0,0 +1,86 @@
+# hotel/pagination.py
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """A page cursor that was not produced by KeysetPage"""
+
+
+def encode_cursor(booking):
+    raw = f"{booking.created_at.isoformat()}|{booking.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+class KeysetPage:
+    """
+    One page of a queryset ordered newest first on (created_at, id).
+
+    Instead of OFFSET, a page starts from the cursor of the last row of the
+    previous page (after) or the first row of the next one (before), so every
+    page is an index range scan of per_page + 1 rows and no COUNT(*) is run.
+    The extra row only tells whether there is a further page.
+    """
+
+    def __init__(self, queryset, per_page, after=None, before=None):
+        if before:
+            created_at, pk = decode_cursor(before)
+            rows = list(queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+            ).order_by('created_at', 'pk')[:per_page + 1])
+            self.has_previous = len(rows) > per_page
+            self.has_next = True
+            self.object_list = rows[:per_page][::-1]
+        else:
+            if after:
+                created_at, pk = decode_cursor(after)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                )
+            rows = list(queryset.order_by('-created_at', '-pk')[:per_page + 1])
+            self.has_previous = bool(after)
+            self.has_next = len(rows) > per_page
+            self.object_list = rows[:per_page]
+        # A stale cursor can land past either end of the list
+        if not self.object_list:
+            self.has_previous = self.has_next = False
+
+    @classmethod
+    def from_request(cls, request, queryset, per_page):
+        """Page for the ?after= / ?before= cursor in the request, or page 1 if it is unusable"""
+        after, before = request.GET.get('after'), request.GET.get('before')
+        try:
+            page = cls(queryset, per_page, after, before)
+        except InvalidCursor:
+            return cls(queryset, per_page)
+        if not page and (after or before):
+            return cls(queryset, per_page)
+        return page
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self.has_previous else None
@@ -0,0 +1,144 @@
+# hotel/pricing.py
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import F, Q
+
+from .models import RoomRate, RoomType
+
+# Prices are handled as integer cents so the NumPy sums are exact
+CENTS = Decimal('0.01')
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    return (Decimal(int(cents)) / 100).quantize(CENTS)
+
+
+def rate_matrix(pairs, start, end, base_prices=None):
+    """
+    Nightly rates in cents for [start, end) as an int64 array with one row
+    per (city_id, room_type_id) pair. Nights without a RoomRate fall back to
+    the room type's price_per_night; a city rate wins over a rate for all
+    cities. base_prices ({room_type_id: price}) skips the RoomType query.
+    """
+    nights = (end - start).days
+    rows = {pair: i for i, pair in enumerate(pairs)}
+    type_ids = {room_type_id for city_id, room_type_id in rows}
+    city_ids = {city_id for city_id, room_type_id in rows if city_id is not None}
+
+    if base_prices is None:
+        base_prices = dict(
+            RoomType.objects.filter(pk__in=type_ids).values_list('pk', 'price_per_night')
+        )
+    matrix = np.empty((len(rows), max(nights, 0)), dtype=np.int64)
+    for (city_id, room_type_id), i in rows.items():
+        matrix[i, :] = to_cents(base_prices[room_type_id])
+    if nights <= 0:
+        return matrix
+
+    # Rows for every city come first so city rates overwrite them below
+    overrides = RoomRate.objects.filter(
+        room_type_id__in=type_ids,
+        night__gte=start,
+        night__lt=end
+    ).filter(
+        Q(city__isnull=True) | Q(city_id__in=city_ids)
+    ).order_by(F('city_id').asc(nulls_first=True)).values_list(
+        'city_id', 'room_type_id', 'night', 'price'
+    )
+
+    rows_by_type = {}
+    for (city_id, room_type_id), i in rows.items():
+        rows_by_type.setdefault(room_type_id, []).append(i)
+
+    target_rows, target_nights, prices = [], [], []
+    for city_id, room_type_id, night, price in overrides:
+        if city_id is None:
+            affected = rows_by_type[room_type_id]
+        elif (city_id, room_type_id) in rows:
+            affected = [rows[(city_id, room_type_id)]]
+        else:
+            continue
+        offset = (night - start).days
+        cents = to_cents(price)
+        for i in affected:
+            target_rows.append(i)
+            target_nights.append(offset)
+            prices.append(cents)
+    if prices:
+        matrix[np.array(target_rows), np.array(target_nights)] = np.array(prices, dtype=np.int64)
+    return matrix
+
+
+def cumulative_rates(matrix):
+    """Prefix sums along the nights axis: sums[i, b] - sums[i, a] prices nights [a, b)"""
+    sums = np.zeros((matrix.shape[0], matrix.shape[1] + 1), dtype=np.int64)
+    np.cumsum(matrix, axis=1, out=sums[:, 1:])
+    return sums
+
+
+def price_stays(stays, base_prices=None):
+    """
+    Price many candidate stays at once.
+    stays is a list of (city_id, room_type_id, check_in, check_out); returns
+    a list of Decimal totals in the same order. One rate matrix covers all
+    the stays and each total is a difference of prefix sums.
+    """
+    if not stays:
+        return []
+    start = min(stay[2] for stay in stays)
+    end = max(stay[3] for stay in stays)
+    pairs = list(dict.fromkeys((city_id, room_type_id) for city_id, room_type_id, _, _ in stays))
+    sums = cumulative_rates(rate_matrix(pairs, start, end, base_prices))
+
+    rows = {pair: i for i, pair in enumerate(pairs)}
+    row_index = np.array([rows[(city_id, room_type_id)] for city_id, room_type_id, _, _ in stays])
+    first = np.array([(check_in - start).days for _, _, check_in, _ in stays])
+    last = np.array([(check_out - start).days for _, _, _, check_out in stays])
+    totals = sums[row_index, last] - sums[row_index, first]
+    return [from_cents(total) for total in totals]
+
+
+def price_stay(room_type, check_in, check_out, city_id=None):
+    """Total price of one stay in a room type, optionally in a specific city"""
+    if check_out <= check_in:
+        return Decimal('0.00')
+    return price_stays(
+        [(city_id, room_type.pk, check_in, check_out)],
+        base_prices={room_type.pk: room_type.price_per_night}
+    )[0]
+
+
+def lowest_nightly_rates(city_id, room_types, check_in, check_out):
+    """Cheapest single night of the stay per room type, as {room_type_id: Decimal}"""
+    base_prices = {room_type.pk: room_type.price_per_night for room_type in room_types}
+    if not base_prices or check_out <= check_in:
+        return {}
+    pairs = [(city_id, room_type_id) for room_type_id in base_prices]
+    lowest = rate_matrix(pairs, check_in, check_out, base_prices).min(axis=1)
+    return {room_type_id: from_cents(cents) for room_type_id, cents in zip(base_prices, lowest)}
+
+
+def cheapest_nightly_rates(pairs, check_in=None, check_out=None):
+    """
+    Lowest average nightly rate per city over the stay (tonight by default),
+    as {city_id: Decimal}, for the given (city_id, room_type_id) pairs.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+    check_in = check_in or date.today()
+    check_out = check_out or check_in + timedelta(days=1)
+    nights = (check_out - check_in).days
+    averages = rate_matrix(pairs, check_in, check_out).sum(axis=1) / nights
+
+    cheapest = {}
+    for (city_id, room_type_id), average in zip(pairs, averages):
+        if city_id not in cheapest or average < cheapest[city_id]:
+            cheapest[city_id] = average
+    return {city_id: from_cents(round(average)) for city_id, average in cheapest.items()}
@@ -0,0 +1,159 @@
+# hotel/reference.py
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+
+from .models import City, ReferenceGeneration, Room, RoomType
+
+# Seconds a process trusts its copies before comparing generations again.
+# With 0 they are compared once per request (and on every lookup outside one).
+CHECK_INTERVAL = getattr(settings, 'REFERENCE_CACHE_CHECK_INTERVAL', 0)
+
+# Generations each model's saves and deletes bump
+INVALIDATED_BY = {
+    City: ['cities'],
+    # Cities carry the number of available rooms
+    Room: ['cities'],
+    RoomType: ['room_types'],
+}
+
+
+class ReferenceTable:
+    """
+    Snapshot of a small table with O(1) lookups by id and by name. The rows
+    are shared by every request in the process, so treat them as read-only.
+    """
+
+    def __init__(self, rows, generation):
+        self.rows = rows
+        self.generation = generation
+        self.by_id = {row.pk: row for row in rows}
+        self.by_name = {}
+        for row in rows:
+            self.by_name.setdefault(row.name, row)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, pk):
+        return self.by_id.get(pk)
+
+    def named(self, name):
+        return self.by_name.get(name)
+
+
+def load_cities():
+    return list(City.objects.filter(is_active=True).annotate(
+        room_count=Count('rooms', filter=Q(rooms__is_available=True))
+    ).order_by('name'))
+
+
+def load_room_types():
+    return list(RoomType.objects.order_by('name'))
+
+
+LOADERS = {
+    'cities': load_cities,
+    'room_types': load_room_types,
+}
+
+_tables = {}
+_generations = {}
+_checked_at = None
+_lock = threading.Lock()
+# Whether this thread has compared generations during the current request
+_local = threading.local()
+
+
+def _begin_request(**kwargs):
+    _local.checked = False
+
+
+def _end_request(**kwargs):
+    _local.checked = None
+
+
+request_started.connect(_begin_request, dispatch_uid='reference-cache-begin')
+request_finished.connect(_end_request, dispatch_uid='reference-cache-end')
+
+
+def revalidate():
+    """Drop the tables whose generation moved since they were loaded"""
+    global _generations, _checked_at
+    generations = dict(ReferenceGeneration.objects.values_list('name', 'generation'))
+    with _lock:
+        for name, table in list(_tables.items()):
+            if table.generation != generations.get(name, 0):
+                del _tables[name]
+        _generations = generations
+        _checked_at = time.monotonic()
+
+
+def table(name):
+    checked = getattr(_local, 'checked', None)
+    recent = _checked_at is not None and time.monotonic() - _checked_at < CHECK_INTERVAL
+    if not (checked or recent):
+        revalidate()
+        if checked is False:
+            _local.checked = True
+
+    current = _tables.get(name)
+    if current is None:
+        with _lock:
+            current = _tables.get(name)
+            if current is None:
+                # The generation was read before the rows, so a change committed
+                # in between only causes one extra reload
+                current = ReferenceTable(LOADERS[name](), _generations.get(name, 0))
+                _tables[name] = current
+    return current
+
+
+def cities():
+    """Active cities by name, each with room_count of available rooms"""
+    return table('cities')
+
+
+def room_types():
+    """Every room type by name"""
+    return table('room_types')
+
+
+def forget(*names):
+    with _lock:
+        for name in names:
+            _tables.pop(name, None)
+
+
+def bump_generations(*names):
+    """
+    Mark reference tables as changed in every process. Call it after bulk
+    writes that send no signals; saves and deletes bump automatically.
+    """
+    for name in names:
+        updated = ReferenceGeneration.objects.filter(name=name).update(
+            generation=F('generation') + 1
+        )
+        if not updated:
+            ReferenceGeneration.objects.get_or_create(name=name, defaults={'generation': 1})
+    # Other processes notice at their next check; this one should not wait
+    transaction.on_commit(lambda: forget(*names))
+
+
+def invalidate_tables(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    bump_generations(*INVALIDATED_BY[sender])
+
+
+for model in INVALIDATED_BY:
+    post_save.connect(invalidate_tables, sender=model, dispatch_uid=f'reference-save-{model.__name__}')
+    post_delete.connect(invalidate_tables, sender=model, dispatch_uid=f'reference-delete-{model.__name__}')
@@ -0,0 +1,165 @@
+# hotel/reservations.py
+import random
+import time
+import uuid
+from collections import Counter
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, F, IntegerField, QuerySet, Value, When
+
+from .availability import active_holds, booked_room_ids, overlapping_bookings
+from .caching import bump_generations
+from .inventory import adjust_sold
+from .holds import release_holds
+from .models import Booking, Room
+
+# Bounded retry for SQLite "database is locked" errors
+LOCK_RETRIES = 5
+LOCK_BACKOFF = 0.05
+
+
+class RoomUnavailable(Exception):
+    """The room is already booked for at least one night of the stay"""
+
+
+class InsufficientInventory(RoomUnavailable):
+    """Fewer rooms are free than a group booking asked for"""
+
+
+def lock_rooms(room_ids):
+    """
+    Take the write locks needed to book the given rooms (ids, or a Room
+    queryset for large sets). Must be called inside transaction.atomic()
+    before any other query.
+
+    PostgreSQL locks only the Room rows (SELECT ... FOR UPDATE), so bookings
+    for different rooms proceed in parallel. SQLite has a single writer, so
+    a no-op UPDATE is issued first: it acquires the write lock immediately,
+    which is what BEGIN IMMEDIATE would do, before the overlap check runs.
+    """
+    if isinstance(room_ids, QuerySet):
+        room_ids = room_ids.values('pk')
+    else:
+        room_ids = sorted(set(room_ids))
+    if connection.vendor == 'sqlite':
+        Room.objects.filter(pk__in=room_ids).update(is_available=F('is_available'))
+    else:
+        # Lock in id order so concurrent multi-room bookings cannot deadlock
+        list(Room.objects.select_for_update().filter(pk__in=room_ids).order_by('pk').values_list('pk'))
+
+
+def is_lock_error(error):
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
+
+
+def with_lock_retry(func, *args, **kwargs):
+    """
+    Run func in its own atomic block, retrying a bounded number of times
+    with jittered exponential backoff if SQLite reports the database is locked.
+    """
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as e:
+            if not is_lock_error(e) or attempt == LOCK_RETRIES or connection.in_atomic_block:
+                raise
+            time.sleep(LOCK_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def _create_booking(booking, session_key):
+    lock_rooms([booking.room_id])
+    clash = overlapping_bookings(booking.check_in, booking.check_out).filter(
+        room_id=booking.room_id
+    ).exists() or active_holds(
+        booking.check_in, booking.check_out, exclude_session=session_key
+    ).filter(room_id=booking.room_id).exists()
+    if clash:
+        raise RoomUnavailable(
+            f"{booking.room} is already booked between {booking.check_in} and {booking.check_out}"
+        )
+    booking.save()
+    if session_key:
+        release_holds(session_key, room_ids=[booking.room_id])
+    return booking
+
+
+def create_booking(booking, session_key=None):
+    """
+    Save an unsaved Booking after atomically verifying that no other
+    non-cancelled booking, or checkout hold of another session, overlaps
+    its room and dates. The session's own hold on the room is released.
+    Raises RoomUnavailable when the room has been taken.
+    """
+    return with_lock_retry(_create_booking, booking, session_key)
+
+
+def free_room_candidates(city, room_types, check_in, check_out, preferred_room_id=None,
+                         session_key=None):
+    """
+    Free rooms for a stay as one set-based query, ordered by preference:
+    the room the guest picked first, then cheapest room type, then id.
+    """
+    rooms = Room.objects.filter(
+        city=city,
+        room_type__in=room_types,
+        is_available=True
+    ).exclude(pk__in=booked_room_ids(check_in, check_out, exclude_session=session_key))
+    preference = Case(
+        When(pk=preferred_room_id, then=Value(0)),
+        default=Value(1),
+        output_field=IntegerField()
+    )
+    return rooms.order_by(preference, 'room_type__price_per_night', 'pk')
+
+
+def _create_group_booking(booking, city, room_types, count, preferred_room_id, session_key):
+    candidates = free_room_candidates(
+        city, room_types, booking.check_in, booking.check_out, preferred_room_id, session_key
+    )
+    if connection.vendor == 'sqlite':
+        # Take the single-writer lock before allocating (see lock_rooms)
+        Room.objects.filter(city=city).update(is_available=F('is_available'))
+    else:
+        # Rooms being booked by someone else right now are skipped, not waited on
+        candidates = candidates.select_for_update(skip_locked=True, of=('self',))
+    allocated = list(candidates.values_list('pk', 'room_type_id')[:count])
+    if len(allocated) < count:
+        raise InsufficientInventory(
+            f"Only {len(allocated)} of {count} rooms are free between "
+            f"{booking.check_in} and {booking.check_out}"
+        )
+
+    details = {
+        field.attname: getattr(booking, field.attname)
+        for field in Booking._meta.concrete_fields
+        if not field.primary_key
+    }
+    details['group_reference'] = uuid.uuid4().hex
+    bookings = Booking.objects.bulk_create([
+        Booking(**dict(details, room_id=room_id))
+        for room_id, room_type_id in allocated
+    ])
+
+    # bulk_create does not send post_save, so update the inventory per room type
+    # and invalidate cached availability here
+    sold = Counter(room_type_id for room_id, room_type_id in allocated)
+    for room_type_id, rooms_sold in sold.items():
+        adjust_sold(city.pk, room_type_id, booking.check_in, booking.check_out, delta=rooms_sold)
+    bump_generations('availability')
+    if session_key:
+        release_holds(session_key)
+    return bookings
+
+
+def create_group_booking(booking, city, room_types, count, preferred_room_id=None,
+                         session_key=None):
+    """
+    Allocate `count` free rooms of the given room types in a city and book
+    them all in one transaction, copying the guest details and dates from
+    the unsaved `booking`. Fails fast with InsufficientInventory when there
+    are not enough free rooms; nothing is saved in that case.
+    """
+    return with_lock_retry(
+        _create_group_booking, booking, city, room_types, count, preferred_room_id, session_key
+    )
@@ -0,0 +1,77 @@
+# hotel/search.py
+from datetime import timedelta
+
+import numpy as np
+
+from .availability import OccupancyIndex
+from .models import Room, RoomType
+from .pricing import from_cents, rate_matrix
+
+# Longest window of start dates a flexible search may sweep
+MAX_WINDOW_DAYS = 90
+
+
+def sliding_sums(values, width):
+    """Sums of every run of `width` consecutive columns, for each row"""
+    sums = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.int64)
+    np.cumsum(values, axis=1, out=sums[:, 1:])
+    return sums[:, width:] - sums[:, :-width]
+
+
+def cheapest_dates(city, window_start, window_days, nights, guests=None, rooms=1, limit=10):
+    """
+    Cheapest available stays of `nights` nights in a city, for every check-in
+    date in [window_start, window_start + window_days).
+
+    Room occupancy and nightly rates are loaded once for the whole window as
+    per-night arrays; availability and price of every candidate stay then
+    come from sliding-window sums over those arrays. Returns up to `limit`
+    options sorted by total price, then date, as dicts.
+    """
+    window_days = min(window_days, MAX_WINDOW_DAYS)
+    if window_days <= 0 or nights <= 0:
+        return []
+    window_end = window_start + timedelta(days=window_days + nights - 1)
+
+    room_types = RoomType.objects.filter(room__city=city, room__is_available=True).distinct()
+    if guests:
+        room_types = room_types.filter(capacity__gte=guests)
+    room_types = {room_type.pk: room_type for room_type in room_types}
+    if not room_types:
+        return []
+    type_ids = list(room_types)
+
+    # Free rooms per room type for every check-in date: shape (types, starts)
+    index = OccupancyIndex.build(
+        Room.objects.filter(city=city, is_available=True, room_type_id__in=type_ids),
+        window_start, window_end
+    )
+    room_ids, room_type_ids, occupied = index.as_array()
+    free_for_stay = sliding_sums(occupied.astype(np.int64), nights) == 0
+    type_rows = {pk: row for row, pk in enumerate(type_ids)}
+    free_counts = np.zeros((len(type_ids), window_days), dtype=np.int64)
+    np.add.at(
+        free_counts,
+        np.array([type_rows[room_type_id] for room_type_id in room_type_ids], dtype=np.intp),
+        free_for_stay.astype(np.int64)
+    )
+
+    # Stay totals in cents for every room type and check-in date
+    base_prices = {pk: room_type.price_per_night for pk, room_type in room_types.items()}
+    rates = rate_matrix([(city.pk, pk) for pk in type_ids], window_start, window_end, base_prices)
+    totals = sliding_sums(rates, nights)
+
+    # Keep stays with enough free rooms, cheapest first, then earliest
+    rows, starts = np.nonzero(free_counts >= rooms)
+    order = np.lexsort((starts, totals[rows, starts]))[:limit]
+    options = []
+    for row, start in zip(rows[order], starts[order]):
+        check_in = window_start + timedelta(days=int(start))
+        options.append({
+            'check_in': check_in,
+            'check_out': check_in + timedelta(days=nights),
+            'room_type': room_types[type_ids[row]],
+            'total_price': from_cents(totals[row, start]),
+            'available_rooms': int(free_counts[row, start]),
+        })
+    return options
@@ -0,0 +1,155 @@
+# hotel/smtp_sink.py
+import base64
+import random
+import socketserver
+import threading
+import time
+
+# Longest command or message line accepted, as in RFC 5321 plus some slack
+MAX_LINE = 8192
+
+
+class SinkStats:
+    """Thread-safe counters of what the sink received"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.recipients = 0
+        self.bytes = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, amount in counts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'connections': self.connections,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'recipients': self.recipients,
+                'bytes': self.bytes,
+            }
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib and Django's SMTP backend, without STARTTLS"""
+
+    def reply(self, code, text):
+        self.wfile.write(f"{code} {text}\r\n".encode())
+
+    def read_line(self):
+        return self.rfile.readline(MAX_LINE).decode('utf-8', 'replace').rstrip('\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        sink.stats.add(connections=1)
+        self.reply(220, 'abchotels SMTP sink ready')
+        recipients = 0
+        while True:
+            line = self.rfile.readline(MAX_LINE)
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+            if command == 'EHLO':
+                self.wfile.write(b"250-localhost\r\n250-8BITMIME\r\n250-AUTH PLAIN LOGIN\r\n250 SMTPUTF8\r\n")
+            elif command == 'HELO':
+                self.reply(250, 'localhost')
+            elif command == 'AUTH':
+                # Any credentials are accepted
+                mechanism, _, initial = argument.partition(' ')
+                if mechanism.upper() == 'LOGIN':
+                    for prompt in ('Username:', 'Password:'):
+                        self.reply(334, base64.b64encode(prompt.encode()).decode())
+                        self.read_line()
+                elif mechanism.upper() == 'PLAIN' and not initial:
+                    self.reply(334, '')
+                    self.read_line()
+                self.reply(235, 'Authentication successful')
+            elif command == 'MAIL':
+                recipients = 0
+                self.reply(250, 'OK')
+            elif command == 'RCPT':
+                recipients += 1
+                self.reply(250, 'OK')
+            elif command == 'DATA':
+                self.reply(354, 'End data with <CR><LF>.<CR><LF>')
+                size = 0
+                while True:
+                    data = self.rfile.readline(MAX_LINE)
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                    size += len(data)
+                sink.delay()
+                if sink.fails():
+                    sink.stats.add(rejected=1)
+                    self.reply(451, 'Temporary failure, try again later')
+                else:
+                    sink.stats.add(accepted=1, recipients=recipients, bytes=size)
+                    self.reply(250, 'OK: queued')
+                recipients = 0
+            elif command in ('RSET', 'NOOP'):
+                recipients = 0
+                self.reply(250, 'OK')
+            elif command == 'QUIT':
+                self.reply(221, 'Bye')
+                return
+            else:
+                self.reply(502, 'Command not implemented')
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    SMTP server on a loopback port that accepts and counts messages without
+    delivering them. Each message waits latency_ms (plus up to jitter_ms)
+    before the server answers, and failure_rate of them are refused with a
+    temporary 451 error, to stand in for a slow or flaky mail provider.
+    """
+
+    def __init__(self, host='127.0.0.1', port=1025, latency_ms=0, jitter_ms=0, failure_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.stats = SinkStats()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.server = SinkServer((host, port), SinkHandler)
+        self.server.sink = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def delay(self):
+        with self._random_lock:
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0
+        if self.latency_ms or jitter:
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def fails(self):
+        with self._random_lock:
+            return self._random.random() < self.failure_rate
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self):
+        """Serve from a background thread, e.g. inside a benchmark"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
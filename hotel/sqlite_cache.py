@@ -0,0 +1,288 @@
+# hotel/sqlite_cache.py
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Seconds a process may delay recording that an entry was read. Reads are
+# recorded with the next write instead of each turning into a write.
+TOUCH_FLUSH_INTERVAL = 1.0
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL
+    ) WITHOUT ROWID
+    """,
+    'CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)',
+    'CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)',
+    # Entry count and size, kept by triggers so the bounds cost no COUNT(*)
+    """
+    CREATE TABLE IF NOT EXISTS totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    )
+    """,
+    'INSERT OR IGNORE INTO totals VALUES (1, 0, 0)',
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_inserted AFTER INSERT ON entries BEGIN
+        UPDATE totals SET entries = entries + 1, bytes = bytes + length(NEW.value) WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_deleted AFTER DELETE ON entries BEGIN
+        UPDATE totals SET entries = entries - 1, bytes = bytes - length(OLD.value) WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_updated AFTER UPDATE OF value ON entries BEGIN
+        UPDATE totals SET bytes = bytes - length(OLD.value) + length(NEW.value) WHERE id = 1;
+    END
+    """,
+]
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache shared by every process on one host, kept in a WAL-mode SQLite
+    file at LOCATION. Readers never block each other or the single writer.
+
+    Entries past their timeout are ignored and then deleted. Once the cache
+    holds more than MAX_ENTRIES entries or MAX_BYTES bytes of pickled
+    values, the least recently read ones are evicted, 1/CULL_FREQUENCY of
+    the cache at a time. Read times are approximate: a process records them
+    in bulk at its next write, or after TOUCH_FLUSH_INTERVAL seconds.
+
+    get_many() reads one snapshot; set_many(), delete_many() and incr() are
+    single transactions, so they are atomic across processes.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        options = params.get('OPTIONS', {})
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+        self._touched = {}
+        self._touched_since = None
+        self._touch_lock = threading.Lock()
+
+    # Connections
+
+    def _connection(self):
+        """This thread's connection, reopened after a fork"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = self._connect()
+            local.pid = os.getpid()
+        return local.connection
+
+    def _connect(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None)
+        connection.execute('PRAGMA journal_mode = WAL')
+        # A crash can lose the last writes but never corrupt the file;
+        # that is enough for a cache
+        connection.execute('PRAGMA synchronous = NORMAL')
+        with self._write(connection):
+            for statement in SCHEMA:
+                connection.execute(statement)
+        return connection
+
+    class _write:
+        """Write transaction, taking the write lock up front to avoid deadlocks"""
+
+        def __init__(self, connection):
+            self.connection = connection
+
+        def __enter__(self):
+            self.connection.execute('BEGIN IMMEDIATE')
+            return self.connection
+
+        def __exit__(self, exc_type, exc, traceback):
+            self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+    def close(self, **kwargs):
+        # Called at the end of every request; the connection is kept for the next one
+        pass
+
+    # Helpers
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _touch(self, keys):
+        now = time.time()
+        with self._touch_lock:
+            for key in keys:
+                self._touched[key] = now
+            if self._touched_since is None:
+                self._touched_since = now
+            due = now - self._touched_since >= TOUCH_FLUSH_INTERVAL
+        if due:
+            with self._write(self._connection()) as connection:
+                self._flush_touches(connection)
+
+    def _flush_touches(self, connection):
+        with self._touch_lock:
+            touched, self._touched, self._touched_since = self._touched, {}, None
+        if touched:
+            connection.executemany(
+                'UPDATE entries SET accessed = ? WHERE key = ? AND accessed < ?',
+                [(accessed, key, accessed) for key, accessed in touched.items()]
+            )
+
+    def _cull(self, connection, now):
+        entries, size = connection.execute('SELECT entries, bytes FROM totals').fetchone()
+        if entries <= self._max_entries and size <= self._max_bytes:
+            return
+        connection.execute('DELETE FROM entries WHERE expires <= ?', (now,))
+        if self._cull_frequency == 0:
+            connection.execute('DELETE FROM entries')
+            return
+        # Evict down to (CULL_FREQUENCY - 1) / CULL_FREQUENCY of each bound
+        entry_target = self._max_entries - self._max_entries // self._cull_frequency
+        byte_target = self._max_bytes - self._max_bytes // self._cull_frequency
+        entries, size = connection.execute('SELECT entries, bytes FROM totals').fetchone()
+        while entries and (entries > entry_target or size > byte_target):
+            excess = max(entries - entry_target, 0)
+            if size > byte_target:
+                # Assume values of average size; the loop corrects the estimate
+                excess = max(excess, -(-(size - byte_target) * entries // size))
+            connection.execute(
+                'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)',
+                (excess,)
+            )
+            entries, size = connection.execute('SELECT entries, bytes FROM totals').fetchone()
+
+    def _store(self, rows, timeout):
+        """Write (key, value) rows in one transaction"""
+        now = time.time()
+        expires = self._expires(timeout)
+        with self._write(self._connection()) as connection:
+            self._flush_touches(connection)
+            connection.executemany(
+                'INSERT INTO entries (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+                'expires = excluded.expires, accessed = excluded.accessed',
+                [(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires, now) for key, value in rows]
+            )
+            self._cull(connection, now)
+
+    # Cache API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write(self._connection()) as connection:
+            self._flush_touches(connection)
+            cursor = connection.execute(
+                'INSERT INTO entries (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+                'expires = excluded.expires, accessed = excluded.accessed '
+                'WHERE entries.expires <= excluded.accessed',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(timeout), now)
+            )
+            added = cursor.rowcount > 0
+            if added:
+                self._cull(connection, now)
+        return added
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value FROM entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return default
+        self._touch([key])
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value FROM entries WHERE key IN ({placeholders}) '
+            'AND (expires IS NULL OR expires > ?)',
+            [*keys, time.time()]
+        ).fetchall()
+        self._touch([key for key, value in rows])
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store([(key, value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        rows = [(self.make_and_validate_key(key, version=version), value) for key, value in data.items()]
+        if rows:
+            self._store(rows, timeout)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write(self._connection()) as connection:
+            cursor = connection.execute(
+                'UPDATE entries SET expires = ?, accessed = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self._expires(timeout), now, key, now)
+            )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        # Read and write under the write lock, so concurrent increments all count
+        with self._write(self._connection()) as connection:
+            row = connection.execute(
+                'SELECT value FROM entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, now)
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE entries SET value = ?, accessed = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now, key)
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write(self._connection()) as connection:
+            cursor = connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [(self.make_and_validate_key(key, version=version),) for key in keys]
+        if keys:
+            with self._write(self._connection()) as connection:
+                connection.executemany('DELETE FROM entries WHERE key = ?', keys)
+
+    def clear(self):
+        with self._write(self._connection()) as connection:
+            connection.execute('DELETE FROM entries')
+        with self._touch_lock:
+            self._touched, self._touched_since = {}, None
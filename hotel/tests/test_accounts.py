@@ -0,0 +1,51 @@
+# hotel/tests/test_accounts.py
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from hotel.models import Booking, City, Room, RoomType
+
+
+class ClaimGuestBookingsTests(TestCase):
+    """Logging in links guest bookings made with the account's email"""
+
+    @classmethod
+    def setUpTestData(cls):
+        city = City.objects.create(name='Claim City', description='Login test')
+        room_type = RoomType.objects.create(name='Claim Room', description='Login test',
+                                            price_per_night=100, capacity=2)
+        cls.room = Room.objects.create(city=city, room_type=room_type)
+
+    def guest_booking(self, email):
+        check_in = timezone.now().date() + timedelta(days=30)
+        return Booking.objects.create(
+            guest_name='Guest', guest_email=email, guest_phone='0', room=self.room,
+            check_in=check_in, check_out=check_in + timedelta(days=2)
+        )
+
+    def log_in(self, username, email):
+        user = User.objects.create_user(username=username, email=email, password='secret-pass-1')
+        self.client.login(username=username, password='secret-pass-1')
+        return user
+
+    def test_email_case_is_ignored(self):
+        booking = self.guest_booking('guest@example.com')
+        user = self.log_in('guest', 'Guest@Example.com')
+        booking.refresh_from_db()
+        self.assertEqual(booking.user, user)
+
+    def test_shared_email_is_left_unlinked(self):
+        booking = self.guest_booking('shared@example.com')
+        User.objects.create_user(username='other', email='SHARED@example.com')
+        self.log_in('shared', 'shared@example.com')
+        booking.refresh_from_db()
+        self.assertIsNone(booking.user)
+
+    def test_padded_guest_email_is_claimed(self):
+        booking = self.guest_booking('  Padded@Example.com ')
+        user = self.log_in('padded', 'padded@example.com')
+        booking.refresh_from_db()
+        self.assertEqual(booking.guest_email, 'padded@example.com')
+        self.assertEqual(booking.user, user)
@@ -0,0 +1,67 @@
+# hotel/tests/test_inventory.py
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from hotel.inventory import free_room_counts, inventory_drift
+from hotel.models import Booking, City, Room, RoomHold, RoomType
+
+
+class FreeRoomCountTests(TestCase):
+    """Search free counts agree with the rooms that can actually be booked"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(name='Inventory City', description='Inventory test')
+        cls.room_type = RoomType.objects.create(name='Inventory Room', description='Inventory test',
+                                                price_per_night=100, capacity=2)
+        cls.rooms = [Room.objects.create(city=cls.city, room_type=cls.room_type) for _ in range(2)]
+        cls.check_in = timezone.now().date() + timedelta(days=30)
+        cls.key = (cls.city.id, cls.room_type.id)
+
+    def book(self, room, nights=3):
+        return Booking.objects.create(
+            guest_name='Guest', guest_email='guest@example.com', guest_phone='0', room=room,
+            check_in=self.check_in, check_out=self.check_in + timedelta(days=nights)
+        )
+
+    def hold(self, room, night):
+        return RoomHold.objects.create(
+            room=room, session_key=f'session-{room.id}-{night}',
+            check_in=self.check_in + timedelta(days=night),
+            check_out=self.check_in + timedelta(days=night + 1),
+            expires_at=timezone.now() + timedelta(minutes=10)
+        )
+
+    def free(self):
+        counts = free_room_counts(self.check_in, self.check_in + timedelta(days=3), city=self.city)
+        return counts.get(self.key, 0)
+
+    def test_bookings_on_unsellable_rooms_are_not_sold(self):
+        self.rooms[0].is_available = False
+        self.rooms[0].save()
+        self.book(self.rooms[0])
+        self.assertEqual(self.free(), 1)
+        self.assertEqual(inventory_drift(), [])
+
+    def test_taking_a_room_out_of_service_releases_its_nights(self):
+        self.book(self.rooms[0])
+        self.assertEqual(self.free(), 1)
+        self.rooms[0].is_available = False
+        self.rooms[0].save()
+        self.assertEqual(self.free(), 1)
+        self.rooms[0].is_available = True
+        self.rooms[0].save()
+        self.assertEqual(self.free(), 1)
+        self.assertEqual(inventory_drift(), [])
+
+    def test_holds_on_different_nights_take_one_room(self):
+        self.hold(self.rooms[0], night=0)
+        self.hold(self.rooms[1], night=2)
+        self.assertEqual(self.free(), 1)
+
+    def test_holds_add_to_rooms_sold_on_the_same_night(self):
+        self.book(self.rooms[0], nights=1)
+        self.hold(self.rooms[1], night=0)
+        self.assertEqual(self.free(), 0)
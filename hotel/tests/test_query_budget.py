@@ -0,0 +1,236 @@
+# hotel/tests/test_query_budget.py
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from hotel.inventory import rebuild_inventory
+from hotel.models import (
+    FAQ, Booking, City, ContactSubmission, Department, JobApplication, JobListing,
+    Room, RoomRate, RoomType
+)
+from hotel.pages import PAGE_PATHS, named_routes, pages
+
+BUDGET_PREFIX = 'Query Budget'
+BUDGET_EMAIL = 'query-budget@abchotels.invalid'
+# Rows of each kind added before the pages are measured a second time; every
+# room gets BOOKINGS_PER_ROOM bookings, so booking tables are the largest
+SCALE = int(os.environ.get('QUERY_BUDGET_SCALE', 500))
+BOOKINGS_PER_ROOM = 5
+# Requests per page on the large dataset; the fastest one is recorded
+REPEAT = 3
+
+# Response size and wall time of every page on the large dataset. Rewrite it
+# with QUERY_BUDGET_SAVE_BASELINE=1 after a change that is meant to alter them.
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'query_budget_baseline.json')
+# Allowed response size growth over the baseline, as a fraction
+SIZE_THRESHOLD = float(os.environ.get('QUERY_BUDGET_SIZE_THRESHOLD', 0.1))
+# Allowed wall time growth over the baseline, as a fraction. Timings depend on
+# the machine, so this is off unless set; growth under MIN_MS is ignored.
+TIME_THRESHOLD = os.environ.get('QUERY_BUDGET_TIME_THRESHOLD')
+MIN_MS = 25
+
+# Most queries each named hotel route may run. Every route needs an entry.
+BUDGETS = {
+    'home': 6,
+    'about': 3,
+    'contact': 3,
+    'faq': 4,
+    'careers': 4,
+    'why_work_with_us': 3,
+    'job_detail': 5,
+    'job_application': 4,
+    'test_email': 3,
+    'register': 3,
+    'login': 3,
+    'logout': 5,
+    'password_change': 3,
+    'password_change_done': 3,
+    'room_list': 9,
+    'city_detail': 9,
+    'flexible_dates': 6,
+    'room_type_detail': 5,
+    'room_detail': 5,
+    'booking_form': 16,
+    'booking_confirmation': 6,
+    'dashboard': 6,
+    'profile': 5,
+    'current_bookings': 5,
+    'booking_list': 5,
+    'booking_list_json': 5,
+    'booking_detail': 5,
+    'account_settings': 3,
+    'email_change': 3,
+    'account_delete': 3,
+    'room_admin': 8,
+    'cache_stats': 3,
+    'mail_status': 3,
+    'debug_urls': 3,
+}
+
+# Admin changelists get this budget unless listed in ADMIN_BUDGETS
+ADMIN_BUDGET = 8
+ADMIN_BUDGETS = {
+    'admin:hotel_roomrate_changelist': 9,
+    'admin:hotel_roominventory_changelist': 9,
+}
+
+
+def grow(fixtures, count):
+    """Add `count` rows of every kind the pages and changelists list"""
+    start = fixtures['count']
+    fixtures['count'] += count
+    numbers = range(start, start + count)
+    today = timezone.now().date()
+
+    cities = City.objects.bulk_create([
+        City(name=f'{BUDGET_PREFIX} City {i}', description='Query budget check') for i in numbers
+    ])
+    room_types = RoomType.objects.bulk_create([
+        RoomType(name=f'{BUDGET_PREFIX} Room {i}', description='Query budget check',
+                 price_per_night=100 + i % 50, capacity=2 + i % 3)
+        for i in numbers
+    ])
+    rooms = Room.objects.bulk_create([
+        Room(city=cities[n % len(cities)], room_type=room_type)
+        for room_type in room_types for n in range(2)
+    ])
+    bookings = Booking.objects.bulk_create([
+        Booking(
+            guest_name='Query Budget', guest_email=BUDGET_EMAIL, guest_phone='0',
+            user=fixtures['user'],
+            room=room, status='confirmed' if n % 4 else 'checked_out',
+            check_in=today + timedelta(days=n % 60 - 10 + 7 * k),
+            check_out=today + timedelta(days=n % 60 - 10 + 7 * k + 1 + n % 4)
+        )
+        for n, room in enumerate(rooms) for k in range(BOOKINGS_PER_ROOM)
+    ], batch_size=1000)
+    RoomRate.objects.bulk_create([
+        RoomRate(room_type=room_type, city=cities[0], night=today + timedelta(days=n), price=90 + n)
+        for room_type in room_types for n in range(3)
+    ])
+    departments = Department.objects.bulk_create([
+        Department(name=f'{BUDGET_PREFIX} Department {i}', description='Query budget check')
+        for i in numbers
+    ])
+    jobs = JobListing.objects.bulk_create([
+        JobListing(
+            title=f'{BUDGET_PREFIX} Job {i}', department=department,
+            description='Query budget check', requirements='None',
+            job_type='full_time', experience_level='entry', location='Anywhere'
+        )
+        for i, department in zip(numbers, departments)
+    ])
+    JobApplication.objects.bulk_create([
+        JobApplication(job=job, first_name='Query', last_name='Budget', email=BUDGET_EMAIL,
+                       phone='0', resume='resumes/query-budget.pdf')
+        for job in jobs
+    ])
+    FAQ.objects.bulk_create([
+        FAQ(question=f'{BUDGET_PREFIX} question {i}?', answer='Yes', order=i) for i in numbers
+    ])
+    ContactSubmission.objects.bulk_create([
+        ContactSubmission(name='Query Budget', email=BUDGET_EMAIL, message=f'Message {i}')
+        for i in numbers
+    ])
+    for i in numbers:
+        User.objects.create(username=f'query-budget-{i}', email=f'query-budget-{i}@abchotels.invalid')
+    # bulk_create skips the signals that keep RoomInventory current
+    rebuild_inventory()
+
+    fixtures.setdefault('city', cities[0])
+    fixtures.setdefault('room_type', room_types[0])
+    fixtures.setdefault('room', rooms[0])
+    fixtures.setdefault('booking', bookings[0])
+    fixtures.setdefault('job', jobs[0])
+
+
+# Measure the views themselves, not the public page cache
+NO_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+@override_settings(CACHES={'default': NO_CACHE, 'shared': NO_CACHE})
+class QueryBudgetTests(TestCase):
+    """Every hotel page and admin changelist stays within its query budget as the data grows"""
+
+    def setUp(self):
+        user = User.objects.create_superuser(username='query-budget', email=BUDGET_EMAIL, password=None)
+        self.fixtures = {
+            'user': user,
+            'check_in': timezone.now().date() + timedelta(days=30),
+            'count': 0,
+        }
+        grow(self.fixtures, 2)
+
+    def budget(self, name):
+        if name in BUDGETS:
+            return BUDGETS[name]
+        return ADMIN_BUDGETS.get(name, ADMIN_BUDGET)
+
+    def measure(self, repeat=1):
+        """{page name: {'queries', 'bytes', 'ms'}} for every page, best of `repeat` requests"""
+        results = {}
+        for name, path in pages():
+            for _ in range(repeat):
+                self.client.force_login(self.fixtures['user'])
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = self.client.get(path(self.fixtures))
+                    elapsed = (time.perf_counter() - started) * 1000
+                self.assertIn(response.status_code, (200, 302), f"{name} returned HTTP {response.status_code}")
+                if name not in results:
+                    results[name] = {
+                        'queries': queries.captured_queries,
+                        'bytes': len(response.content),
+                        'ms': elapsed,
+                    }
+                results[name]['ms'] = min(results[name]['ms'], elapsed)
+        return results
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(sorted(set(named_routes()) - set(BUDGETS)), [])
+        self.assertEqual(sorted(set(named_routes()) - set(PAGE_PATHS)), [])
+
+    def test_pages_stay_within_budget(self):
+        small = self.measure()
+        grow(self.fixtures, SCALE)
+        large = self.measure(REPEAT)
+
+        if os.environ.get('QUERY_BUDGET_SAVE_BASELINE'):
+            with open(BASELINE_FILE, 'w', encoding='utf-8') as file:
+                json.dump({
+                    name: {'bytes': result['bytes'], 'ms': round(result['ms'], 1)}
+                    for name, result in large.items()
+                }, file, indent=2, sort_keys=True)
+                file.write('\n')
+        with open(BASELINE_FILE, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        for name, result in large.items():
+            with self.subTest(page=name):
+                queries = result['queries']
+                sql = '\n'.join(query['sql'] for query in queries)
+                self.assertLessEqual(len(queries), self.budget(name), f"over budget:\n{sql}")
+                self.assertLessEqual(
+                    len(queries), len(small[name]['queries']),
+                    f"grew from {len(small[name]['queries'])} queries with the data:\n{sql}"
+                )
+
+                self.assertIn(name, baseline, "no baseline; run with QUERY_BUDGET_SAVE_BASELINE=1")
+                previous = baseline[name]
+                self.assertLessEqual(
+                    result['bytes'], previous['bytes'] * (1 + SIZE_THRESHOLD),
+                    f"larger than the baseline of {previous['bytes']} bytes"
+                )
+                if TIME_THRESHOLD is not None:
+                    allowed_ms = max(previous['ms'] * float(TIME_THRESHOLD), MIN_MS)
+                    self.assertLessEqual(
+                        result['ms'] - previous['ms'], allowed_ms,
+                        f"slower than the baseline of {previous['ms']:.1f}ms"
+                    )
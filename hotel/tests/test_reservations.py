@@ -0,0 +1,88 @@
+# hotel/tests/test_reservations.py
+import random
+import threading
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from hotel.availability import CANCELLED
+from hotel.models import Booking, City, Room, RoomType
+from hotel.reservations import RoomUnavailable, create_booking
+
+THREADS = 8
+ATTEMPTS = 10
+# Nights the random stays fall in; small, so most attempts contend
+WINDOW = 14
+
+
+def double_bookings():
+    """Overlapping pairs of live bookings for the same room"""
+    stays = Booking.objects.exclude(status=CANCELLED).order_by(
+        'room_id', 'check_in'
+    ).values_list('room_id', 'check_in', 'check_out')
+    clashes = 0
+    last_room, last_out = None, None
+    for room_id, check_in, check_out in stays:
+        if room_id == last_room and check_in < last_out:
+            clashes += 1
+        if room_id != last_room or check_out > last_out:
+            last_room, last_out = room_id, check_out
+    return clashes
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """create_booking from many threads at once never double books a room"""
+
+    def setUp(self):
+        city = City.objects.create(name='Stress City', description='Concurrency test')
+        room_type = RoomType.objects.create(name='Stress Room', description='Concurrency test',
+                                            price_per_night=100, capacity=2)
+        self.rooms = [Room.objects.create(city=city, room_type=room_type) for _ in range(2)]
+
+    def test_no_double_bookings(self):
+        window_start = timezone.now().date() + timedelta(days=30)
+        results = {'booked': 0, 'conflict': 0}
+        errors = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                for _ in range(ATTEMPTS):
+                    check_in = window_start + timedelta(days=rng.randrange(WINDOW))
+                    booking = Booking(
+                        guest_name='Stress Test',
+                        guest_email='stress-test@abchotels.invalid',
+                        guest_phone='0',
+                        room=rng.choice(self.rooms),
+                        check_in=check_in,
+                        check_out=check_in + timedelta(days=rng.randint(1, 3)),
+                    )
+                    try:
+                        create_booking(booking)
+                        outcome = 'booked'
+                    except RoomUnavailable:
+                        outcome = 'conflict'
+                    except Exception as e:
+                        with lock:
+                            errors.append(e)
+                        continue
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results['booked'] + results['conflict'], THREADS * ATTEMPTS)
+        self.assertGreater(results['booked'], 0)
+        self.assertGreater(results['conflict'], 0)
+        self.assertEqual(double_bookings(), 0)
+        self.assertEqual(Booking.objects.count(), results['booked'])
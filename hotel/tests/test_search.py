@@ -0,0 +1,33 @@
+# hotel/tests/test_search.py
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from hotel.models import City, Room, RoomType
+
+NO_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+@override_settings(CACHES={'default': NO_CACHE, 'shared': NO_CACHE})
+class FlexibleDatesTests(TestCase):
+    """Flexible date search answers bad windows with a 400, not an error page"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(name='Flexible City', description='Search test')
+        room_type = RoomType.objects.create(name='Flexible Room', description='Search test',
+                                            price_per_night=100, capacity=2)
+        Room.objects.create(city=cls.city, room_type=room_type)
+
+    def search(self, **params):
+        return self.client.get(reverse('flexible_dates', args=[self.city.id]), params)
+
+    def test_window_past_the_last_date_is_rejected(self):
+        self.assertEqual(self.search(start='9999-12-25', days=60).status_code, 400)
+
+    def test_stays_past_the_last_date_are_rejected(self):
+        self.assertEqual(self.search(start='9999-12-20', days=5, nights=30).status_code, 400)
+
+    def test_valid_window_is_searched(self):
+        response = self.search(days=14, nights=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['nights'], 2)
@@ -31,6 +31,7 @@ urlpatterns = [
     # Rooms and bookings
     path('rooms/', views.room_list, name='room_list'),
     path('cities/<int:city_id>/', views.city_detail, name='city_detail'),
+    path('cities/<int:city_id>/flexible-dates/', views.flexible_dates, name='flexible_dates'),
     path('room-types/<int:room_type_id>/', views.room_type_detail, name='room_type_detail'),
     path('rooms/<int:room_id>/', views.room_detail, name='room_detail'),
     path('rooms/<int:room_id>/book/', views.booking_form, name='booking_form'),
@@ -41,6 +42,7 @@ urlpatterns = [
     path('profile/', views.profile, name='profile'),
     path('profile/current-bookings/', views.current_bookings, name='current_bookings'),
     path('bookings/', views.booking_list, name='booking_list'),
+    path('bookings/json/', views.booking_list_json, name='booking_list_json'),
     path('bookings/<int:booking_id>/', views.booking_detail, name='booking_detail'),
     path('account-settings/', views.account_settings, name='account_settings'),
     
@@ -50,6 +52,8 @@ urlpatterns = [
 
     # Admin
     path('room-admin/', views.room_admin, name='room_admin'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
+    path('mail-status/', views.mail_status, name='mail_status'),
 
     # Debug
     path('debug-urls/', views.debug_url_patterns, name='debug_urls'),
@@ -1,5 +1,6 @@
 # hotel/views.py
 from django.shortcuts import render, get_object_or_404, redirect
+from django.db import OperationalError, transaction
 from django.db.models import Q, Count, Min
 from django.core.paginator import Paginator
 from django.contrib import messages
@@ -7,18 +8,39 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.urls import reverse
-from django.http import HttpResponse, Http404
-from datetime import datetime, date
+from django.http import HttpResponse, Http404, JsonResponse
+from datetime import datetime, date, timedelta
+import calendar
 from .models import City, RoomType, Room, Booking, FAQ, JobListing, ContactSubmission
+from .availability import parse_stay_dates, room_type_availability
+from .pricing import price_stay, cheapest_nightly_rates, lowest_nightly_rates
+from .search import cheapest_dates, MAX_WINDOW_DAYS
+from .holds import place_hold
+from .inventory import free_room_counts
+from .caching import cache_public_page, page_cache_stats, AVAILABILITY_CACHE_TIMEOUT
+from .conditional import (conditional_page, faq_state, careers_state, job_detail_state,
+                          room_detail_state, city_detail_state)
+from .pagination import KeysetPage, InvalidCursor
+from .outbox import enqueue, message as outbox_message
+from .digests import sends_realtime
+from . import mailer
+from . import reference
+from .reservations import create_booking, create_group_booking, is_lock_error, RoomUnavailable, InsufficientInventory
 from django.contrib.admin.views.decorators import staff_member_required
 from .forms import BookingForm, CustomUserCreationForm, ContactForm
-from django.core.mail import send_mail, BadHeaderError
+from django.core.mail import EmailMessage, BadHeaderError
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.contrib.auth import update_session_auth_hash
 from django.core.exceptions import ValidationError
 
+# Upper bound for the "rooms" search parameter on a single group booking
+MAX_GROUP_ROOMS = 10
+
+# Bookings per page on the booking history pages and their JSON feed
+BOOKINGS_PER_PAGE = 20
+
 
 def register(request):
     if request.method == 'POST':
@@ -57,6 +79,7 @@ def debug_url_patterns(request):
     except Exception as e:
         return HttpResponse(f"URL pattern error: {e}")
 
+@cache_public_page('catalog')
 def home(request):
     featured_cities = City.objects.filter(is_active=True).annotate(
         room_count=Count('rooms', filter=Q(rooms__is_available=True))
@@ -66,8 +89,9 @@ def home(request):
     }
     return render(request, 'home.html', context)
 
+@cache_public_page('catalog', 'availability', timeout=AVAILABILITY_CACHE_TIMEOUT)
 def room_list(request):
-    all_cities = City.objects.filter(is_active=True).order_by('name')
+    all_cities = reference.cities()
 
     selected_city = request.GET.get('city', '')
     selected_check_in = request.GET.get('check_in', '')
@@ -75,41 +99,52 @@ def room_list(request):
     selected_guests = request.GET.get('guests', '')
     selected_rooms = request.GET.get('rooms', '')
 
-    if selected_city:
-        try:
-            city = City.objects.get(name=selected_city, is_active=True)
-            redirect_url = f'/cities/{city.id}/'
-            params = []
-            params.append(f'city={selected_city}')
-            if selected_check_in:
-                params.append(f'check_in={selected_check_in}')
-            if selected_check_out:
-                params.append(f'check_out={selected_check_out}')
-            if selected_guests:
-                params.append(f'guests={selected_guests}')
-            if selected_rooms:
-                params.append(f'rooms={selected_rooms}')
-
-            if params:
-                redirect_url += "?" + "&".join(params)
-            return redirect(redirect_url)
-        except City.DoesNotExist:
-            pass
+    city = reference.cities().named(selected_city) if selected_city else None
+    if city is not None:
+        redirect_url = f'/cities/{city.id}/'
+        params = []
+        params.append(f'city={selected_city}')
+        if selected_check_in:
+            params.append(f'check_in={selected_check_in}')
+        if selected_check_out:
+            params.append(f'check_out={selected_check_out}')
+        if selected_guests:
+            params.append(f'guests={selected_guests}')
+        if selected_rooms:
+            params.append(f'rooms={selected_rooms}')
 
-    cities = City.objects.filter(is_active=True)
-    cities = cities.annotate(
-        room_count=Count('rooms', filter=Q(rooms__is_available=True)),
-        starting_price=Min('rooms__room_type__price_per_night')
-    ).order_by('name')
+        if params:
+            redirect_url += "?" + "&".join(params)
+        return redirect(redirect_url)
+
+    # Only count rooms that are free for the requested nights
+    stay = parse_stay_dates(selected_check_in, selected_check_out)
+    free_counts = free_room_counts(*(stay or ()))
+    room_counts = {}
+    for (city_id, room_type_id), free in free_counts.items():
+        room_counts[city_id] = room_counts.get(city_id, 0) + free
+
+    cities = list(City.objects.filter(is_active=True).order_by('name'))
+    for city in cities:
+        city.room_count = room_counts.get(city.id, 0)
 
     if selected_rooms:
         min_rooms = int(selected_rooms)
-        cities = cities.filter(room_count__gte=min_rooms)
+        cities = [city for city in cities if city.room_count >= min_rooms]
 
     paginator = Paginator(cities, 12)
     page_number = request.GET.get('page')
     cities_page = paginator.get_page(page_number)
 
+    # Starting price from the rate calendar, over the room types still free
+    page_city_ids = {city.id for city in cities_page}
+    room_type_pairs = [
+        pair for pair, free in free_counts.items() if free and pair[0] in page_city_ids
+    ]
+    starting_prices = cheapest_nightly_rates(room_type_pairs, *(stay or ()))
+    for city in cities_page:
+        city.starting_price = starting_prices.get(city.id)
+
     context = {
         'cities': cities_page,
         'all_cities': all_cities,
@@ -122,9 +157,13 @@ def room_list(request):
     }
     return render(request, 'room_list.html', context)
 
+@conditional_page(city_detail_state)
+@cache_public_page('catalog', 'availability', timeout=AVAILABILITY_CACHE_TIMEOUT)
 def city_detail(request, city_id):
-    city = get_object_or_404(City, id=city_id, is_active=True)
-    all_cities = City.objects.filter(is_active=True).order_by('name')
+    all_cities = reference.cities()
+    city = all_cities.get(city_id)
+    if city is None:
+        raise Http404('No City matches the given query.')
 
     selected_city = request.GET.get('city', '')
     selected_check_in = request.GET.get('check_in', '')
@@ -132,55 +171,43 @@ def city_detail(request, city_id):
     selected_guests = request.GET.get('guests', '')
     selected_rooms = request.GET.get('rooms', '')
 
-    if selected_city and selected_city != city.name:
-        try:
-            new_city = City.objects.get(name=selected_city, is_active=True)
-            redirect_url = f"/cities/{new_city.id}/"
-            params = []
-            params.append(f"city={selected_city}")
-            if selected_check_in:
-                params.append(f"check_in={selected_check_in}")
-            if selected_check_out:
-                params.append(f"check_out={selected_check_out}")
-            if selected_guests:
-                params.append(f"guests={selected_guests}")
-            if selected_rooms:
-                params.append(f"rooms={selected_rooms}")
-            if params:
-                redirect_url += "?" + "&".join(params)
-            return redirect(redirect_url)
-        except City.DoesNotExist:
-            pass
-
-    room_types = RoomType.objects.filter(
-        room__city=city,
-        room__is_available=True
-    ).distinct()
-
+    new_city = all_cities.named(selected_city) if selected_city != city.name else None
+    if new_city is not None:
+        redirect_url = f"/cities/{new_city.id}/"
+        params = []
+        params.append(f"city={selected_city}")
+        if selected_check_in:
+            params.append(f"check_in={selected_check_in}")
+        if selected_check_out:
+            params.append(f"check_out={selected_check_out}")
+        if selected_guests:
+            params.append(f"guests={selected_guests}")
+        if selected_rooms:
+            params.append(f"rooms={selected_rooms}")
+        if params:
+            redirect_url += "?" + "&".join(params)
+        return redirect(redirect_url)
+
+    # With valid dates, count only rooms that are free for every night
+    stay = parse_stay_dates(selected_check_in, selected_check_out)
+    min_capacity = None
     if selected_guests and selected_guests.strip():
         try:
-            selected_guests_int = int(selected_guests)
-            room_types = room_types.filter(capacity__gte=selected_guests_int)
+            min_capacity = int(selected_guests)
         except ValueError:
             pass
+    room_types = room_type_availability(city, *(stay or ()), min_capacity=min_capacity)
+    check_in, check_out = stay or (date.today(), date.today() + timedelta(days=1))
+    min_prices = lowest_nightly_rates(city.id, room_types, check_in, check_out)
+    room_type_data = [{
+        'room_type': room_type,
+        'available_room_id': room_type.available_room_id,
+        'available_count': room_type.available_count,
+        'min_price': min_prices[room_type.id],
+    } for room_type in room_types]
 
-    room_type_data = []
-    for room_type in room_types:
-        available_room = Room.objects.filter(
-            room_type=room_type,
-            city=city,
-            is_available=True
-        ).first()
-        room_type_data.append({
-            'room_type': room_type,
-            'available_room_id': available_room.id if available_room else None
-        })
-
-    other_cities = City.objects.filter(
-        is_active=True
-    ).exclude(id=city_id).annotate(
-        room_count=Count('rooms', filter=Q(rooms__is_available=True))
-    ).order_by('name')[:6]
+    # The city picker and the "other cities" list come from the reference cache
+    other_cities = [other for other in all_cities if other.id != city.id][:6]
 
     context = {
         'city': city,
@@ -196,8 +223,71 @@ def city_detail(request, city_id):
     }
     return render(request, 'city_detail.html', context)
 
+def flexible_dates(request, city_id):
+    """
+    JSON: cheapest available stays of `nights` nights in a city for any
+    check-in date in a month (?month=YYYY-MM) or in a window
+    (?start=YYYY-MM-DD&days=N). Optional guests, rooms and limit.
+    """
+    city = reference.cities().get(city_id)
+    if city is None:
+        raise Http404('No City matches the given query.')
+    today = date.today()
+    try:
+        nights = min(max(int(request.GET.get('nights', 3)), 1), 30)
+        guests = int(request.GET.get('guests') or 0) or None
+        rooms = min(max(int(request.GET.get('rooms') or 1), 1), MAX_GROUP_ROOMS)
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+        month = request.GET.get('month', '')
+        if month:
+            window_start = datetime.strptime(month, '%Y-%m').date()
+            window_days = calendar.monthrange(window_start.year, window_start.month)[1]
+        else:
+            start = request.GET.get('start', '')
+            window_start = datetime.strptime(start, '%Y-%m-%d').date() if start else today
+            window_days = int(request.GET.get('days', 30))
+        # Past check-in dates cannot be booked
+        window_end = window_start + timedelta(days=min(window_days, MAX_WINDOW_DAYS))
+        window_start = max(window_start, today)
+        # Stays starting late in the window must still end on a valid date
+        if window_end > date.max - timedelta(days=nights):
+            raise OverflowError('window ends too close to date.max')
+    except (ValueError, OverflowError):
+        return JsonResponse({'error': 'Invalid search parameters'}, status=400)
+
+    options = cheapest_dates(
+        city,
+        window_start,
+        (window_end - window_start).days,
+        nights,
+        guests=guests,
+        rooms=rooms,
+        limit=limit
+    )
+    city_url = reverse('city_detail', kwargs={'city_id': city.id})
+    return JsonResponse({
+        'city': city.name,
+        'nights': nights,
+        'rooms': rooms,
+        'options': [
+            {
+                'check_in': option['check_in'].isoformat(),
+                'check_out': option['check_out'].isoformat(),
+                'room_type_id': option['room_type'].id,
+                'room_type': option['room_type'].name,
+                'total_price': str(option['total_price']),
+                'available_rooms': option['available_rooms'],
+                'url': f"{city_url}?check_in={option['check_in']}&check_out={option['check_out']}&rooms={rooms}",
+            }
+            for option in options
+        ],
+    })
+
+@cache_public_page('catalog')
 def room_type_detail(request, room_type_id):
-    room_type = get_object_or_404(RoomType, id=room_type_id)
+    room_type = reference.room_types().get(room_type_id)
+    if room_type is None:
+        raise Http404('No RoomType matches the given query.')
     available_rooms = Room.objects.filter(
         room_type=room_type,
         is_available=True
@@ -210,6 +300,7 @@ def room_type_detail(request, room_type_id):
     }
     return render(request, 'room_type_detail.html', context)
 
+@conditional_page(room_detail_state)
 def room_detail(request, room_id):
     room = get_object_or_404(Room, id=room_id, is_available=True)
     similar_rooms = Room.objects.filter(
@@ -230,6 +321,11 @@ def booking_form(request, room_id):
     check_in = request.GET.get('check_in')
     check_out = request.GET.get('check_out')
     selected_guests = request.GET.get('guests', '') # Get guests from URL params
+    selected_rooms = request.GET.get('rooms', '')
+    try:
+        rooms_requested = min(max(int(selected_rooms), 1), MAX_GROUP_ROOMS)
+    except ValueError:
+        rooms_requested = 1
 
     if request.method == 'POST':
         form = BookingForm(request.POST)
@@ -237,10 +333,29 @@ def booking_form(request, room_id):
             try:
                 booking = form.save(commit=False)
                 booking.room = room
-                booking.save()
-
-                messages.success(request, f'Booking confirmed! Total price: ${booking.total_price}')
+                if request.user.is_authenticated:
+                    booking.user = request.user
+                if rooms_requested > 1:
+                    # Group booking: allocate the other rooms of the same type in this city
+                    bookings = create_group_booking(
+                        booking,
+                        city=room.city,
+                        room_types=[room.room_type],
+                        count=rooms_requested,
+                        preferred_room_id=room.id,
+                        session_key=request.session.session_key
+                    )
+                    booking = bookings[0]
+                    group_total = sum(group_booking.total_price for group_booking in bookings)
+                    messages.success(request, f'{len(bookings)} rooms booked! Total price: ${group_total}')
+                else:
+                    create_booking(booking, session_key=request.session.session_key)
+                    messages.success(request, f'Booking confirmed! Total price: ${booking.total_price}')
                 return redirect('booking_confirmation', booking_id=booking.id)
+            except InsufficientInventory as e:
+                messages.error(request, f'Sorry, we could not book {rooms_requested} rooms. {e}.')
+            except RoomUnavailable:
+                messages.error(request, 'Sorry, this room has just been booked for the selected dates. Please choose other dates or another room.')
             except Exception as e:
                 messages.error(request, f'Error creating booking: {str(e)}')
         else:
@@ -269,16 +384,34 @@ def booking_form(request, room_id):
     # Calculate total nights and amount for display
     total_nights = 0
     total_amount = 0
+    hold_expires_at = None
     if check_in and check_out:
         try:
             from datetime import datetime
             check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
             check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
             total_nights = (check_out_date - check_in_date).days
-            total_amount = total_nights * room.room_type.price_per_night
+            if total_nights > 0:
+                total_amount = price_stay(room.room_type, check_in_date, check_out_date,
+                                          city_id=room.city_id) * rooms_requested
         except ValueError:
             pass
 
+    # Hold the room while the guest fills in the form
+    if request.method == 'GET' and total_nights > 0:
+        if not request.session.session_key:
+            request.session.create()
+        try:
+            hold_expires_at = place_hold(room, check_in_date, check_out_date,
+                                         request.session.session_key)
+            if hold_expires_at is None:
+                messages.warning(request, 'This room is no longer available for the selected dates. Please choose other dates or another room.')
+        except OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            # Still locked after the retries: show the form without a hold;
+            # the room is checked again when the booking is submitted
+
     context = {
         'room': room,
         'form': form,
@@ -286,52 +419,37 @@ def booking_form(request, room_id):
         'total_nights': total_nights,
         'total_amount': total_amount,
         'selected_guests': selected_guests,
+        'rooms_requested': rooms_requested,
+        'hold_expires_at': hold_expires_at,
     }
     return render(request, 'booking_form.html', context)
 
 def booking_confirmation(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(
+        Booking.objects.select_related('room__city', 'room__room_type'), id=booking_id
+    )
     
     # Calculate number of nights
     nights = (booking.check_out - booking.check_in).days
     
-    # Send confirmation email to guest AND notification to company
-    guest_email_sent = False
-    company_email_sent = False
-    email_error = None
-    
-    try:
-        # 1. Send confirmation email to GUEST
-        if hasattr(settings, 'EMAIL_HOST_USER') and settings.EMAIL_HOST_USER:
-            guest_subject = f'ABC Hotels - Booking Confirmation #{booking.id}'
-            
-            # Render HTML email template for guest
-            guest_html_message = render_to_string('emails/send_confirmation.html', {
-                'booking': booking,
-                'nights': nights
-            })
-            
-            # Create plain text version for guest
-            guest_plain_message = strip_tags(guest_html_message)
-            
-            # Send email to GUEST
-            send_mail(
-                subject=guest_subject,
-                message=guest_plain_message,
-                from_email='ABC Hotels <anitatam2001@gmail.com>',
-                recipient_list=[booking.guest_email],
-                html_message=guest_html_message,
-                fail_silently=False,
-            )
-            
-            guest_email_sent = True
-            print(f"✅ Confirmation email sent to GUEST: {booking.guest_email} for booking #{booking.id}")
-            
-            # 2. Send notification email to COMPANY/HOTEL STAFF
-            company_subject = f'📋 New Booking Received - #{booking.id} - ABC {booking.room.city.name} Hotel'
-            
-            # Create notification message for company
-            company_message = f"""
+    # Queue the guest confirmation and the staff notification for send_outbox.
+    # Their dedupe keys make a refresh of this page queue nothing new. In
+    # digest mode the staff hear of most bookings from hotel.digests instead.
+    guest_html_message = render_to_string('emails/send_confirmation.html', {
+        'booking': booking,
+        'nights': nights
+    })
+    emails = [outbox_message(
+        f'booking-{booking.id}-guest-confirmation',
+        f'ABC Hotels - Booking Confirmation #{booking.id}',
+        strip_tags(guest_html_message),
+        [booking.guest_email],
+        from_email='ABC Hotels <anitatam2001@gmail.com>',
+        html_body=guest_html_message,
+    )]
+    if sends_realtime(booking.room.city.name):
+        company_subject = f'📋 New Booking Received - #{booking.id} - ABC {booking.room.city.name} Hotel'
+        company_message = f"""
 NEW BOOKING NOTIFICATION - ABC Hotels
 
 Booking Details:
@@ -367,60 +485,92 @@ Please prepare the room and ensure everything is ready for the guest's arrival.
 ABC Hotels Management System
 {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
-            
-            # Send email to COMPANY
-            send_mail(
-                subject=company_subject,
-                message=company_message.strip(),
-                from_email='ABC Hotels Booking System <anitatam2001@gmail.com>',
-                recipient_list=['anitatam2001@gmail.com'],  # Send to company email
-                html_message=None,
-                fail_silently=False,
-            )
-            
-            company_email_sent = True
-            print(f"✅ Notification email sent to COMPANY for booking #{booking.id}")
-            
-        else:
-            email_error = "Email configuration not set up"
-            print("⚠️ Email configuration not set up - skipping email sending")
-            
-    except Exception as e:
-        # Log the error
-        email_error = str(e)
-        print(f"❌ Failed to send emails for booking #{booking.id}: {email_error}")
-    
+        emails.append(outbox_message(
+            f'booking-{booking.id}-company-notification',
+            company_subject,
+            company_message.strip(),
+            ['anitatam2001@gmail.com'],
+            from_email='ABC Hotels Booking System <anitatam2001@gmail.com>',
+        ))
+    enqueue(*emails)
+
     context = {
         'booking': booking,
         'nights': nights,
-        'guest_email_sent': guest_email_sent,
-        'company_email_sent': company_email_sent,
-        'email_error': email_error,
     }
     
     return render(request, 'booking_confirmation.html', context)
 
+def user_bookings(user, current=False):
+    """The user's bookings; current=True keeps only stays that have not ended"""
+    bookings = Booking.objects.select_related('room__city', 'room__room_type').filter(
+        user=user
+    ).with_totals()
+    if current:
+        bookings = bookings.filter(check_out__gte=timezone.now().date())
+    return bookings
+
 @login_required
 def booking_list(request):
     """View to display all bookings for the current user"""
-    if request.user.is_authenticated:
-        bookings = Booking.objects.filter(guest_email=request.user.email).order_by('-created_at')
-    else:
-        bookings = []
+    bookings = KeysetPage.from_request(request, user_bookings(request.user), BOOKINGS_PER_PAGE)
     context = {
         'bookings': bookings,
     }
     return render(request, 'booking_list.html', context)
 
+@login_required
+def booking_list_json(request):
+    """
+    The current user's bookings as JSON, newest first, one page at a time.
+    Follow the next/previous URLs to page; ?current=1 limits it to stays
+    that have not ended.
+    """
+    current = request.GET.get('current') == '1'
+    try:
+        page = KeysetPage(
+            user_bookings(request.user, current=current),
+            BOOKINGS_PER_PAGE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid page cursor'}, status=400)
+
+    def page_url(direction, cursor):
+        if cursor is None:
+            return None
+        query = f"{direction}={cursor}" + ('&current=1' if current else '')
+        return request.build_absolute_uri(f"{reverse('booking_list_json')}?{query}")
+
+    return JsonResponse({
+        'bookings': [
+            {
+                'id': booking.id,
+                'city': booking.room.city.name,
+                'room_type': booking.room.room_type.name,
+                'check_in': booking.check_in.isoformat(),
+                'check_out': booking.check_out.isoformat(),
+                'guests': booking.display_guests,
+                'status': booking.status,
+                'total_price': str(booking.total_price),
+                'created_at': booking.created_at.isoformat(),
+                'url': request.build_absolute_uri(reverse('booking_detail', args=[booking.id])),
+            }
+            for booking in page
+        ],
+        'next': page_url('after', page.next_cursor),
+        'previous': page_url('before', page.previous_cursor),
+    })
+
 @login_required
 def booking_detail(request, booking_id):
     """Detailed view of a specific booking"""
-    booking = get_object_or_404(Booking, id=booking_id)
-    if not request.user.is_staff:
-        if hasattr(booking, 'user') and booking.user != request.user:
-            raise Http404("Booking not found")
-        elif booking.guest_email != request.user.email:
-            raise Http404("Booking not found")
+    booking = get_object_or_404(
+        Booking.objects.select_related('room__city', 'room__room_type'), id=booking_id
+    )
+    if not request.user.is_staff and booking.user_id != request.user.id:
+        raise Http404("Booking not found")
     nights = (booking.check_out - booking.check_in).days
     price_per_night = booking.room.room_type.price_per_night
     context = {
@@ -430,6 +580,7 @@ def booking_detail(request, booking_id):
     }
     return render(request, 'booking_detail.html', context)
 
+@cache_public_page()
 def about(request):
     return render(request, 'about.html')
 
@@ -446,16 +597,14 @@ def contact(request):
             return render(request, 'contact.html')
 
         try:
-            # Save to database first (this will always work)
-            submission = ContactSubmission.objects.create(
-                name=name,
-                email=email,
-                subject=subject,
-                message=message
-            )
-            # Try to send emails (but don't fail the whole process if email fails)
-            email_sent = False
-            try:
+            # The submission and both emails are saved together or not at all
+            with transaction.atomic():
+                submission = ContactSubmission.objects.create(
+                    name=name,
+                    email=email,
+                    subject=subject,
+                    message=message
+                )
                 # Email to hotel (you)
                 hotel_subject = f'New Contact Form: {subject}'
                 hotel_message = f"""
@@ -471,13 +620,6 @@ Message:
 This email was sent from your website contact form at {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}
 Submission ID: {submission.id}
 """
-                send_mail(
-                    subject=hotel_subject,
-                    message=hotel_message.strip(),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.EMAIL_HOST_USER],
-                    fail_silently=False,
-                )
 
                 # Auto-reply to user
                 user_subject = 'Thank you for contacting ABC Hotels'
@@ -500,29 +642,31 @@ ABC Hotels Team
 📍 123 Luxury Avenue, Hospitality District
 www.abchotels.com
 """
-                send_mail(
-                    subject=user_subject,
-                    message=user_message.strip(),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[email],
-                    fail_silently=False,
-                )
-                email_sent = True
-                print(f"🔍 Emails sent successfully for submission {submission.id}")
-            except Exception as e:
-                print(f"▲ Email failed but submission saved (ID: {submission.id}): {e}")
-                # Continue anyway since the submission is saved to database
 
-            if email_sent:
-                messages.success(request, 'Thank you for your message! We have sent you a confirmation email and will get back to you soon.')
-            else:
-                messages.success(request, 'Thank you for your message! We have received your inquiry and will get back to you soon. (Email confirmation may be delayed)')
+                emails = [outbox_message(
+                    f'contact-{submission.id}-auto-reply',
+                    user_subject,
+                    user_message.strip(),
+                    [email],
+                )]
+                # In digest mode the hotel hears of submissions from hotel.digests
+                if sends_realtime():
+                    emails.append(outbox_message(
+                        f'contact-{submission.id}-hotel-notification',
+                        hotel_subject,
+                        hotel_message.strip(),
+                        [settings.EMAIL_HOST_USER],
+                    ))
+                enqueue(*emails)
+            messages.success(request, 'Thank you for your message! We will email you a confirmation and get back to you soon.')
 
         except Exception as e:
             messages.error(request, 'There was an error sending your message. Please try again.')
             print(f"❌ Contact form error: {e}")
     return render(request, 'contact.html')
 
+@conditional_page(faq_state)
+@cache_public_page('faq')
 def faq(request):
     faqs = FAQ.objects.filter(is_active=True)
     context = {
@@ -530,6 +674,8 @@ def faq(request):
     }
     return render(request, 'faq.html', context)
 
+@conditional_page(careers_state)
+@cache_public_page('careers')
 def careers(request):
     job_listings = JobListing.objects.filter(is_active=True)
     context = {
@@ -537,6 +683,7 @@ def careers(request):
     }
     return render(request, 'careers.html', context)
 
+@conditional_page(job_detail_state)
 def job_detail(request, job_id):
     job = get_object_or_404(JobListing, id=job_id, is_active=True)
     context = {
@@ -565,15 +712,23 @@ def user_logout(request):
 
 @login_required
 def dashboard(request):
-    if request.user.is_authenticated:
-        bookings = Booking.objects.filter(guest_email=request.user.email)
-    else:
-        bookings = []
+    # The dashboard only shows the latest three
+    bookings = user_bookings(request.user)[:3]
     context = {
         'bookings': bookings,
     }
     return render(request, 'dashboard.html', context)
 
+@staff_member_required
+def cache_stats(request):
+    """JSON hit and miss counters of the public page cache, for monitoring"""
+    return JsonResponse(page_cache_stats())
+
+@staff_member_required
+def mail_status(request):
+    """JSON SMTP circuit breaker state and send latency counters, for monitoring"""
+    return JsonResponse(mailer.mail_stats())
+
 @staff_member_required
 def room_admin(request):
     rooms = Room.objects.all().select_related('city', 'room_type')
@@ -592,12 +747,10 @@ def room_admin(request):
 @login_required
 def profile(request):
     # Show all bookings by default
-    if request.user.is_authenticated:
-        user_bookings = Booking.objects.filter(guest_email=request.user.email).order_by('-created_at')
-    else:
-        user_bookings = []
     context = {
-        'user_bookings': user_bookings,
+        'user_bookings': KeysetPage.from_request(
+            request, user_bookings(request.user), BOOKINGS_PER_PAGE
+        ),
         'show_all': True  # Flag to indicate showing all bookings
     }
     return render(request, 'profile.html', context)
@@ -605,16 +758,10 @@ def profile(request):
 @login_required
 def current_bookings(request):
     # Show only current/future bookings
-    today = timezone.now().date()
-    if request.user.is_authenticated:
-        user_bookings = Booking.objects.filter(
-            guest_email=request.user.email,
-            check_out__gte=today  # Only bookings that haven't ended
-        ).order_by('-created_at')
-    else:
-        user_bookings = []
     context = {
-        'user_bookings': user_bookings,
+        'user_bookings': KeysetPage.from_request(
+            request, user_bookings(request.user, current=True), BOOKINGS_PER_PAGE
+        ),
         'show_all': False  # Flag to indicate showing current bookings only
     }
     return render(request, 'profile.html', context)
@@ -626,15 +773,18 @@ def account_settings(request):
 
 # Test email function
 def test_email(request):
+    email = EmailMessage(
+        subject='Test Email from ABC Hotels',
+        body='This is a test email from your Django application.',
+        from_email='ABC Hotels <anitatam2001@gmail.com>',
+        to=['anitatam2001@yahoo.com.hk'],
+        connection=mailer.connection(),
+    )
     try:
-        send_mail(
-            subject='Test Email from ABC Hotels',
-            message='This is a test email from your Django application.',
-            from_email='ABC Hotels <anitatam2001@gmail.com>',
-            recipient_list=['anitatam2001@yahoo.com.hk'],
-            fail_silently=False,
-        )
+        mailer.deliver(email)
         return HttpResponse("Test email sent successfully!")
+    except mailer.MailUnavailable:
+        return HttpResponse("Test email skipped: SMTP is failing, sending is paused for now")
     except Exception as e:
         return HttpResponse(f"Failed to send test email: {str(e)}")
     
@@ -4,6 +4,7 @@ import sys
 import django
 import csv
 import time
+from decimal import Decimal
 
 # Setup Django environment
 sys.path.append('/Users/anita/abchotels')
@@ -11,10 +12,15 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'abchotels.settings')
 
 django.setup()
 
-from django.db import connection
+from django.db import connection, transaction
+from django.utils import timezone
+from hotel import caching, reference
+from hotel.inventory import recount_totals
 from hotel.models import City, RoomType, Room, Department, Booking, FAQ, JobListing, JobApplication
 
 CSV_FOLDER = 'csv'
+# Rows written per batch; each file is imported in one transaction
+BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
 
 def close_db_connection():
     """Explicitly close database connection to prevent locking"""
@@ -76,213 +82,247 @@ def skip_comments_and_get_reader(file):
     else:
         return None
 
-def import_city(filename):
+def read_csv_rows(filename):
+    """Read every data row of a CSV file, or None when it has none"""
+    filepath = os.path.join(CSV_FOLDER, filename)
+    print(f"Reading from: {filepath}")
+
+    with open(filepath, 'r', encoding='utf-8') as file:
+        reader = skip_comments_and_get_reader(file)
+        rows = list(reader) if reader else []
+
+    if not rows:
+        print("No data found in CSV file")
+        return None
+    return rows
+
+def existing_ids(model, ids):
+    """Which of these ids are already in the table, fetched in one query over their range"""
+    if not ids:
+        return set()
+    return set(
+        model.objects.filter(pk__gte=min(ids), pk__lte=max(ids)).values_list('pk', flat=True)
+    ) & set(ids)
+
+def save_objects(model, objects, fields, batch_size=BATCH_SIZE):
+    """
+    Insert the objects whose id is new and overwrite fields of the others,
+    batch_size rows per statement. objects maps id to an unsaved instance.
+    Returns (created, updated).
+    """
+    existing = existing_ids(model, list(objects))
+    new_objects = [obj for pk, obj in objects.items() if pk not in existing]
+    old_objects = [obj for pk, obj in objects.items() if pk in existing]
+
+    model.objects.bulk_create(new_objects, batch_size=batch_size)
+    # bulk_update() builds a CASE WHEN per field and row, which gets slow fast;
+    # an INSERT ... ON CONFLICT DO UPDATE writes the same rows in one pass.
+    # auto_now fields are filled in by the insert, so updated_at is set too.
+    model.objects.bulk_create(
+        old_objects,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=fields + ['updated_at']
+    )
+    return len(new_objects), len(old_objects)
+
+def insert_rows(model, columns, rows, batch_size=BATCH_SIZE):
+    """
+    Insert value tuples with executemany, batch_size rows at a time. Values
+    must already be in database format; save(), bulk_create() and signals
+    are bypassed, which is what makes large files fast.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    column_sql = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in columns)
+    sql = f"INSERT INTO {table} ({column_sql}) VALUES ({', '.join(['%s'] * len(columns))})"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+    return len(rows)
+
+def refresh_caches(model):
+    """Bulk writes send no signals, so invalidate the cached pages and tables a save would"""
+    caching.invalidate_pages(model)
+    if model in reference.INVALIDATED_BY:
+        reference.invalidate_tables(model)
+
+def print_rate(count, started):
+    elapsed = time.perf_counter() - started
+    print(f"  {count} rows in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+def import_city(filename, batch_size=BATCH_SIZE):
     """Import City data from CSV"""
     try:
-        filepath = os.path.join(CSV_FOLDER, filename)
-        print(f"Reading from: {filepath}")
-
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = skip_comments_and_get_reader(file)
-            if not reader:
-                print("No data found in CSV file")
-                return 0
-
-            cities_created = 0
-            cities_updated = 0
-
-            for row in reader:
-                # Use the image filename directly - assuming CSV has correct relative path
-                image_filename = row['Image Filename']
-                if image_filename:
-                    # Use the filename as-is from CSV
-                    image_path = image_filename
-                else:
-                    image_path = ''
-
-                defaults = {
-                    'name': row['Name'], 
-                    'description': row['Description'], 
-                    'is_active': row['Is Active'].lower() == 'true',
-                    'image': image_path
-                }
-
-                city, created = City.objects.get_or_create(
-                    id=row['ID'], 
-                    defaults=defaults
-                )
-
-                if created:
-                    cities_created += 1
-                else:
-                    # Update existing city
-                    for key, value in defaults.items():
-                        setattr(city, key, value)
-                    city.save()
-                    cities_updated += 1
-
-                close_db_connection()
-
-            print(f"Cities: {cities_created} created, {cities_updated} updated")
-            return cities_created
+        started = time.perf_counter()
+        rows = read_csv_rows(filename)
+        if rows is None:
+            return 0
+
+        cities = {}
+        repeats = 0
+        for row in rows:
+            city_id = int(row['ID'])
+            # A repeated ID overwrites the earlier row, as a second save did before
+            repeats += city_id in cities
+            cities[city_id] = City(
+                id=city_id,
+                name=row['Name'],
+                description=row['Description'],
+                is_active=row['Is Active'].lower() == 'true',
+                # Use the filename as-is from CSV - assuming it has the correct relative path
+                image=row['Image Filename'] or ''
+            )
+
+        with transaction.atomic():
+            cities_created, cities_updated = save_objects(
+                City, cities, ['name', 'description', 'is_active', 'image'], batch_size
+            )
+            refresh_caches(City)
+        cities_updated += repeats
+
+        print(f"Cities: {cities_created} created, {cities_updated} updated")
+        print_rate(len(rows), started)
+        return cities_created
 
     except Exception as e:
         print(f"Error importing cities: {e}")
         return 0
 
-def import_roomtype(filename):
+def import_roomtype(filename, batch_size=BATCH_SIZE):
     """Import RoomType data from CSV"""
     try:
-        filepath = os.path.join(CSV_FOLDER, filename)
-        print(f"Reading from: {filepath}")
-        
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = skip_comments_and_get_reader(file)
-            if not reader:
-                print("No data found in CSV file")
-                return 0
-            
-            roomtypes_created = 0
-            roomtypes_updated = 0
-            
-            for row in reader:
-                # Use the image filename directly - assuming CSV has correct relative path
-                image_filename = row['Image Filename']
-                if image_filename:
-                    # Use the filename as-is from CSV
-                    image_path = image_filename
-                else:
-                    image_path = ''
-
-                defaults = {
-                    'name': row['Name'], 
-                    'description': row['Description'], 
-                    'price_per_night': float(row['Price Per Night']),
-                    'capacity': int(row['Capacity']),
-                    'image': image_path
-                }
-                
-                roomtype, created = RoomType.objects.get_or_create(
-                    id=row['ID'], 
-                    defaults=defaults
-                )
-                
-                if created:
-                    roomtypes_created += 1
-                else:
-                    # Update existing room type
-                    for key, value in defaults.items():
-                        setattr(roomtype, key, value)
-                    roomtype.save()
-                    roomtypes_updated += 1
-                    
-                close_db_connection()
-                
-            print(f"Room Types: {roomtypes_created} created, {roomtypes_updated} updated")
-            return roomtypes_created
-            
+        started = time.perf_counter()
+        rows = read_csv_rows(filename)
+        if rows is None:
+            return 0
+
+        roomtypes = {}
+        repeats = 0
+        for row in rows:
+            roomtype_id = int(row['ID'])
+            # A repeated ID overwrites the earlier row, as a second save did before
+            repeats += roomtype_id in roomtypes
+            roomtypes[roomtype_id] = RoomType(
+                id=roomtype_id,
+                name=row['Name'],
+                description=row['Description'],
+                price_per_night=Decimal(row['Price Per Night']),
+                capacity=int(row['Capacity']),
+                # Use the filename as-is from CSV - assuming it has the correct relative path
+                image=row['Image Filename'] or ''
+            )
+
+        with transaction.atomic():
+            roomtypes_created, roomtypes_updated = save_objects(
+                RoomType, roomtypes,
+                ['name', 'description', 'price_per_night', 'capacity', 'image'], batch_size
+            )
+            refresh_caches(RoomType)
+        roomtypes_updated += repeats
+
+        print(f"Room Types: {roomtypes_created} created, {roomtypes_updated} updated")
+        print_rate(len(rows), started)
+        return roomtypes_created
+
     except Exception as e:
         print(f"Error importing room types: {e}")
         return 0
 
-def import_department(filename):
+def import_department(filename, batch_size=BATCH_SIZE):
     """Import Department data from CSV"""
     try:
-        filepath = os.path.join(CSV_FOLDER, filename)
-        print(f"Reading from: {filepath}")
-        
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = skip_comments_and_get_reader(file)
-            if not reader:
-                print("No data found in CSV file")
-                return 0
-
-            departments_created = 0
-            departments_updated = 0
-
-            for row in reader:
-                defaults = {
-                    'name': row['Name'], 
-                    'description': row['Description']
-                }
-
-                department, created = Department.objects.get_or_create(
-                    id=row['ID'],
-                    defaults=defaults
-                )
-
-                if created:
-                    departments_created += 1
-                else:
-                    # Update existing department
-                    for key, value in defaults.items():
-                        setattr(department, key, value)
-                    department.save()
-                    departments_updated += 1
-
-                close_db_connection()
-                
-            print(f"Departments: {departments_created} created, {departments_updated} updated")
-            return departments_created
+        started = time.perf_counter()
+        rows = read_csv_rows(filename)
+        if rows is None:
+            return 0
+
+        departments = {}
+        repeats = 0
+        for row in rows:
+            department_id = int(row['ID'])
+            # A repeated ID overwrites the earlier row, as a second save did before
+            repeats += department_id in departments
+            departments[department_id] = Department(
+                id=department_id,
+                name=row['Name'],
+                description=row['Description']
+            )
+
+        with transaction.atomic():
+            departments_created, departments_updated = save_objects(
+                Department, departments, ['name', 'description'], batch_size
+            )
+            refresh_caches(Department)
+        departments_updated += repeats
+
+        print(f"Departments: {departments_created} created, {departments_updated} updated")
+        print_rate(len(rows), started)
+        return departments_created
 
     except Exception as e:
         print(f"Error importing departments: {e}")
         return 0
 
-def import_room(filename):
+def import_room(filename, batch_size=BATCH_SIZE):
     """Import Room data from CSV with duplicate prevention"""
     try:
-        filepath = os.path.join(CSV_FOLDER, filename)
-        print(f"Reading from: {filepath}")
-        
-        with open(filepath, 'r', encoding='utf-8') as file:
-            reader = skip_comments_and_get_reader(file)
-            if not reader:
-                print("No data found in CSV file")
-                return 0
-
-            rooms_created = 0
-            rooms_skipped = 0
-            missing_refs = 0
-
-            for row in reader:
-                try:
-                    city = City.objects.get(id=row['City ID'])
-                    room_type = RoomType.objects.get(id=row['Room Type ID'])
-
-                    # Check if room with same ID already exists
-                    if Room.objects.filter(id=row['ID']).exists():
-                        print(f"^ Room {row['ID']} already exists - skipping")
-                        rooms_skipped += 1
-                        continue
-
-                    room, created = Room.objects.get_or_create(
-                        id=row['ID'],
-                        defaults={
-                            'city': city,
-                            'room_type': room_type,
-                            'is_available': row['Is Available'].lower() == 'true'
-                        }
-                    )
-
-                    if created:
-                        rooms_created += 1
-
-                except City.DoesNotExist:
-                    print(f"^ City ID {row['City ID']} not found for room {row['ID']}")
-                    missing_refs += 1
-                except RoomType.DoesNotExist:
-                    print(f"^ RoomType ID {row['Room Type ID']} not found for room {row['ID']}")
-                    missing_refs += 1
-                    
-                close_db_connection()
-                
-            print(f"✓ Rooms: {rooms_created} created")
-            if rooms_skipped > 0:
-                print(f"^ Skipped {rooms_skipped} duplicate rooms")
-            if missing_refs > 0:
-                print(f"^ Skipped {missing_refs} rooms due to missing references")
-            return rooms_created
+        started = time.perf_counter()
+        rows = read_csv_rows(filename)
+        if rows is None:
+            return 0
+
+        city_ids = set(City.objects.filter(
+            id__in={int(row['City ID']) for row in rows}
+        ).values_list('id', flat=True))
+        roomtype_ids = set(RoomType.objects.filter(
+            id__in={int(row['Room Type ID']) for row in rows}
+        ).values_list('id', flat=True))
+
+        # Rooms that already exist are left as they are
+        existing = existing_ids(Room, [int(row['ID']) for row in rows])
+        rooms = {}
+        rooms_skipped = 0
+        missing_refs = 0
+
+        for row in rows:
+            room_id = int(row['ID'])
+            city_id = int(row['City ID'])
+            roomtype_id = int(row['Room Type ID'])
+
+            if city_id not in city_ids:
+                print(f"^ City ID {row['City ID']} not found for room {row['ID']}")
+                missing_refs += 1
+            elif roomtype_id not in roomtype_ids:
+                print(f"^ RoomType ID {row['Room Type ID']} not found for room {row['ID']}")
+                missing_refs += 1
+            elif room_id in existing or room_id in rooms:
+                print(f"^ Room {row['ID']} already exists - skipping")
+                rooms_skipped += 1
+            else:
+                rooms[room_id] = (city_id, roomtype_id, row['Is Available'].lower() == 'true')
+
+        updated = connection.ops.adapt_datetimefield_value(timezone.now())
+        new_rooms = [
+            (room_id, city_id, roomtype_id, is_available, '', updated)
+            for room_id, (city_id, roomtype_id, is_available) in rooms.items()
+        ]
+
+        with transaction.atomic():
+            rooms_created = insert_rows(
+                Room, ['id', 'city', 'room_type', 'is_available', 'image', 'updated_at'], new_rooms, batch_size
+            )
+            # Stored inventory nights count the sellable rooms of each type and city
+            recount_totals({room[1] for room in new_rooms if room[3]})
+            refresh_caches(Room)
+
+        print(f"✓ Rooms: {rooms_created} created")
+        if rooms_skipped > 0:
+            print(f"^ Skipped {rooms_skipped} duplicate rooms")
+        if missing_refs > 0:
+            print(f"^ Skipped {missing_refs} rooms due to missing references")
+        print_rate(len(rows), started)
+        return rooms_created
 
     except Exception as e:
         print(f"Error importing rooms: {e}")
@@ -314,7 +354,6 @@ def import_all_data():
         print(f"\n→ Importing {step_name}...")
         records = import_func(filename)
         total_records += records
-        time.sleep(0.5)
 
     print("\n" + "=" * 60)
     print("  IMPORT COMPLETED SUCCESSFULLY!")